@@ -0,0 +1,70 @@
+import functools
+import numpy as np
+import pandas as pd
+import loader
+
+
+KEYS = ['question', 'answer', 'condition']
+# name -> (file, column renames)
+SOURCES = {
+    'top-1': ('../Data/adherence_summary.xlsx', {'answer_participant': 'answer'}),
+    'dd-top5': ('../Data/adherence_eval_dd-top5.xlsx', {}),
+}
+
+# name -> (source, map_values); map_values is applied to the raw labels before mapping 'yes'/'no' to 1/0
+DD_TOP5_LABELS = [i for i in range(1, 6)] + [f'{i}, {d}' for i in range(1, 6) for d in ['more', 'less']]
+DEFINITIONS = {
+    'top-1': ('top-1', {'more': 'yes', 'less': 'yes'}),
+    'top-1 strict': ('top-1', {'more': 'no', 'less': 'no'}),
+    'dd-top5': ('dd-top5', {label: 'yes' for label in DD_TOP5_LABELS}),
+}
+
+class AdherenceEngine:
+    """Adherence lookups for several definitions at once.
+
+    The (question, answer, condition) keys of all sources are encoded once; each source keeps an
+    integer array of label codes per key, so adherence of a response is a gather instead of a merge.
+    """
+    def __init__(self, sources=SOURCES):
+        tables = {name: loader.read_excel(fn).rename(rename, axis=1) for name, (fn, rename) in sources.items()}
+        keys = pd.concat([t[KEYS] for t in tables.values()]).drop_duplicates()
+        self.index = pd.MultiIndex.from_frame(keys)
+        self.labels = {}
+        for name, t in tables.items():
+            codes, uniques = pd.factorize(t.Adherence)
+            label_codes = np.full(len(self.index), -1)
+            label_codes[self.encode(t)] = codes
+            self.labels[name] = (label_codes, uniques)
+
+    def encode(self, df):
+        # position of each row's key, -1 if it was not evaluated
+        return self.index.get_indexer(pd.MultiIndex.from_frame(df[KEYS]))
+
+    def lookup(self, source, map_values):
+        # adherence per label, with a trailing NaN for unknown keys (code -1)
+        label_codes, uniques = self.labels[source]
+        values = pd.Series(uniques, dtype=object).replace(map_values).map({'yes': 1, 'no': 0}).astype(float)
+        return np.append(values.values, np.nan)[label_codes]
+
+    def compute(self, df, definitions=DEFINITIONS):
+        """Mean adherence per participant (rows) for each definition (columns) in a single pass.
+
+        ResponseId and the keys may be columns or index levels of `df` (e.g. indexed by ResponseId).
+        """
+        if not {'ResponseId', *KEYS} <= set(df.columns): df = df.reset_index()
+        df = df[~(df.condition == 'control')]
+        keys = self.encode(df)
+        participants, ids = pd.factorize(df.ResponseId, sort=True)
+        _, first = np.unique(participants, return_index=True)
+        out = pd.DataFrame({'condition': df.condition.values[first]}, index=pd.Index(ids, name='ResponseId'))
+        for name, (source, map_values) in definitions.items():
+            values = np.append(self.lookup(source, map_values), np.nan)[keys]
+            valid = ~np.isnan(values)
+            sums = np.bincount(participants[valid], values[valid], minlength=len(ids))
+            counts = np.bincount(participants[valid], minlength=len(ids))
+            out[name] = np.divide(sums, counts, out=np.full(len(ids), np.nan), where=counts > 0)
+        return out
+
+@functools.lru_cache(maxsize=None)
+def get_engine():
+    return AdherenceEngine()
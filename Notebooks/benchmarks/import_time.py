@@ -0,0 +1,40 @@
+"""Import time of the utils package in a fresh interpreter.
+
+Run from the Notebooks folder: python benchmarks/import_time.py [--budget SECONDS]
+Fails if the lightweight import exceeds the budget or loads one of the heavy dependencies.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+
+NOTEBOOKS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ['pandas', 'numpy', 'statsmodels', 'scipy', 'matplotlib', 'seaborn']
+
+IMPORTS = {
+    'light': 'from utils import map_condition, map_condition_label, GROUND_TRUTHS, TASKS',
+    'full': 'from utils import *',
+}
+
+def measure(statement, repeat=5):
+    code = ('import sys, time, json; t = time.perf_counter(); ' + statement + '; '
+            'print(json.dumps([time.perf_counter() - t, [m for m in %r if m in sys.modules]]))' % HEAVY)
+    runs = [json.loads(subprocess.run([sys.executable, '-c', code], cwd=NOTEBOOKS, check=True,
+                                      capture_output=True, text=True).stdout) for _ in range(repeat)]
+    return min(r[0] for r in runs), runs[0][1]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget', type=float, default=0.1, help='seconds allowed for the light import')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {name: measure(statement, args.repeat) for name, statement in IMPORTS.items()}
+    for name, (seconds, loaded) in results.items():
+        print(f'{name:<6} {seconds * 1000:8.1f} ms  heavy modules: {", ".join(loaded) or "-"}')
+
+    seconds, loaded = results['light']
+    assert not loaded, f'lightweight import loaded {loaded}'
+    assert seconds < args.budget, f'lightweight import took {seconds:.3f}s, budget is {args.budget:.3f}s'
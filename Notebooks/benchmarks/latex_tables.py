@@ -0,0 +1,74 @@
+"""Rendering of regression tables into the supplement: utils.get_tabular/to_table vs. tables.Supplement.
+
+Run from the Notebooks folder: python benchmarks/latex_tables.py [--sizes 10 100 1000]
+Checks that both produce the same supplement and reports the time per batch.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import build
+import tables
+from utils import get_tabular, to_table, escape_percent
+
+
+class Results:
+    # the attributes of statsmodels results used by get_tabular
+    def __init__(self, rng, k=6):
+        names = ['const'] + [f'condition_{c}' for c in ['standard', 'cot', 'differential']] + \
+                [f'covariate_{i}' for i in range(k - 4)]
+        self.params = pd.Series(rng.normal(0, 1, k), index=names)
+        self.bse = pd.Series(rng.uniform(0.01, 0.5, k), index=names)
+        self.pvalues = pd.Series(rng.uniform(0, 0.2, k) ** 2, index=names)
+        self.aic = rng.normal(0, 3000)
+        self.nobs = int(rng.integers(100, 3000))
+        self.ci = pd.concat([self.params - 1.96 * self.bse, self.params + 1.96 * self.bse], axis=1)
+
+    def conf_int(self):
+        return self.ci
+
+def legacy(models, tex_dir):
+    # save_tex for each table, then consolidate_tex
+    for fn, m in models.items():
+        with open(os.path.join(tex_dir, f'{fn}.tex'), 'w') as f:
+            f.write(to_table(get_tabular(m), fn, f'Model {fn}: P-values and 95% CI'))
+    o = ''
+    for fn in models:
+        with open(os.path.join(tex_dir, f'{fn}.tex')) as f:
+            o += escape_percent(f.read())
+        o += '\n\n'
+    with open(os.path.join(tex_dir, tables.SUPPLEMENT), 'w') as f:
+        f.write(o)
+
+def streamed(models, tex_dir):
+    with tables.Supplement(tex_dir) as supplement:
+        for fn, m in models.items():
+            supplement.add_model(fn, m, caption=f'Model {fn}: P-values and 95% CI')
+
+def timed(func, models):
+    with tempfile.TemporaryDirectory() as tex_dir:
+        t = time.perf_counter()
+        func(models, tex_dir)
+        seconds = time.perf_counter() - t
+        with open(os.path.join(tex_dir, tables.SUPPLEMENT)) as f:
+            return seconds, f.read()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+    build.RECORD = False
+
+    rng = np.random.default_rng(0)
+    for n in args.sizes:
+        models = {f'model-{i}': Results(rng) for i in range(n)}
+        t_legacy, out_legacy = timed(legacy, models)
+        t_streamed, out_streamed = timed(streamed, models)
+        assert out_legacy == out_streamed, 'supplements differ'
+        print(f'{n:6d} tables  legacy {t_legacy:8.3f} s  streamed {t_streamed:8.3f} s  '
+              f'speed-up {t_legacy / t_streamed:5.1f}x')
@@ -0,0 +1,62 @@
+"""All-pairs condition comparisons: comparisons.compare vs. a loop over scipy.stats per pair.
+
+Run from the Notebooks folder: python benchmarks/pairwise_tests.py [--sizes 400 10000 100000]
+Checks that both give the same statistics and p-values on a binary, a Likert and a continuous
+outcome (the latter with a distinct value per row) and reports the time of each.
+"""
+import os
+import sys
+import time
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import comparisons
+
+
+OUTCOMES = ['correct', 'likert', 'time']
+
+def data(n, rng, groups=4):
+    condition = rng.integers(1, groups + 1, n)
+    return pd.DataFrame({'condition': condition,
+                         'correct': (rng.random(n) < 0.5 + 0.05 * condition).astype(float),
+                         'likert': np.clip(np.rint(rng.normal(4 + 0.2 * condition, 1.5)), 1, 7),
+                         'time': rng.lognormal(3.8 + 0.05 * condition, 0.7)})
+
+def loop(df, outcomes):
+    # one scipy call per outcome, test and pair
+    order = sorted(df.condition.unique())
+    rows = []
+    for o in outcomes:
+        for g1, g2 in itertools.combinations(order, 2):
+            x, y = df.loc[df.condition == g1, o], df.loc[df.condition == g2, o]
+            t = stats.ttest_ind(x, y, equal_var=False)
+            u = stats.mannwhitneyu(x, y, method='asymptotic')
+            rows += [(o, 'welch', g1, g2, t.statistic, t.pvalue), (o, 'mwu', g1, g2, u.statistic, u.pvalue)]
+    return pd.DataFrame(rows, columns=['outcome', 'test', 'group1', 'group2', 'statistic', 'p'])
+
+def timed(func, *args):
+    t = time.perf_counter()
+    out = func(*args)
+    return time.perf_counter() - t, out
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[400, 10000, 100000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for n in args.sizes:
+        df = data(n, rng)
+        t_loop, ref = timed(loop, df, OUTCOMES)
+        t_vec, out = timed(lambda: comparisons.compare(df, OUTCOMES, tests=['welch', 'mwu'], correction=None))
+        keys = ['outcome', 'test', 'group1', 'group2']
+        merged = ref.merge(out, on=keys, suffixes=('_ref', ''), validate='one_to_one')
+        assert len(merged) == len(ref), 'missing comparisons'
+        for c in ['statistic', 'p']:
+            err = (merged[c] - merged[f'{c}_ref']).abs() / np.maximum(merged[f'{c}_ref'].abs(), 1e-300)
+            assert (err < 1e-8).all(), f'{c} differs:\n{merged[err >= 1e-8]}'
+        print(f'{n:7d} rows  scipy loop {t_loop:7.3f} s  compare {t_vec:7.3f} s  speed-up {t_loop / t_vec:5.1f}x')
@@ -0,0 +1,123 @@
+"""End-to-end benchmark of the preprocessing and analysis pipeline on synthetic exports.
+
+Run from the Notebooks folder: python benchmarks/pipeline.py [--sizes 1000 10000] [--csv FILE]
+By default, 1k and 10k participants are run; pass e.g. --sizes 100000 for a larger export.
+
+For each number of participants, a synthetic export (see synthetic.py) is generated once into
+../Data/.cache and every stage is timed, with its peak traced memory. The stages follow
+01_preprocessing.ipynb and the analysis modules.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+import warnings
+import pandas as pd
+
+NOTEBOOKS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, NOTEBOOKS)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(NOTEBOOKS)
+import loader
+import preprocessing
+import survey
+import matching
+import scoring
+import timing
+import mixed
+import comparisons
+import tables
+import store
+import build
+from utils import fit
+from synthetic import Generator
+
+
+def get_export(n, seed=0):
+    fn = os.path.join(loader.CACHE_DIR, f'synthetic-{n}-{seed}.csv')
+    if not os.path.exists(fn):
+        os.makedirs(loader.CACHE_DIR, exist_ok=True)
+        Generator(seed=seed).write(n, fn)
+    return fn
+
+class Stages:
+    """Runs named stages in order and records their time and peak traced memory."""
+    def __init__(self):
+        self.results = []
+
+    def __call__(self, name, func, *args, **kwargs):
+        tracemalloc.start()
+        t = time.perf_counter()
+        out = func(*args, **kwargs)
+        seconds = time.perf_counter() - t
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.results.append({'stage': name, 'seconds': seconds, 'peak MB': peak / 2 ** 20})
+        return out
+
+def judgements():
+    df_map = loader.read_excel('../Data/judgement_rad.xlsx', usecols=['question', 'answer', 'judgement radiologist'])
+    df_map = df_map.rename({'judgement radiologist': 'judgement'}, axis=1)
+    df_map['answer'] = df_map['answer'].astype(str)
+    df_map['judgement'] = df_map.judgement.str.capitalize()
+    return df_map
+
+def merge_judgements(df_long, df_map):
+    df_eval = pd.merge(df_long, df_map, on=['question', 'answer'], how='left', validate='many_to_one')
+    return matching.AnswerIndex.from_judgements(df_map).resolve(df_eval, threshold=0.9)
+
+def models(df_eval):
+    df_eval = df_eval.assign(correct=(df_eval.judgement == 'Yes').astype(float),
+                             condition=df_eval.condition.astype(int).astype(str))
+    return {'ols': fit(df_eval, 'correct', ['condition']),
+            'mixed': mixed.fit_mixed(df_eval, 'correct', ['condition'], cache=False)}
+
+def write_tables(results, tex_dir):
+    with tables.Supplement(tex_dir) as supplement:
+        for name, m in results.items():
+            supplement.add_model(name, m, add_info=m.get_add_info() if name == 'mixed' else {'AIC': 'aic', 'Obs. ($N$)': 'nobs'})
+
+def run(n):
+    fn = get_export(n)
+    stage = Stages()
+    items = [i for c in scoring.CONSTRUCTS.values() for i in c['items']]
+    with tempfile.TemporaryDirectory() as tmp:
+        index = stage('survey index', survey.get_index, fn)
+        stage('load', pd.read_csv, fn, skiprows=[1, 2], encoding='utf-8-sig', low_memory=False,
+              parse_dates=loader.DATE_COLS)
+        df, df_long, _ = stage('filter and melt', preprocessing.filter_and_melt, fn, participant_cols=items)
+        df_long['question'] = stage('map questions', survey.lookup, df_long.question, index)
+        df_eval = stage('judgement merge', merge_judgements, df_long, judgements())
+        scores, _ = stage('construct scoring', scoring.score, df)
+        df_eval = stage('construct broadcast', scoring.broadcast, df_eval, scores)
+        times = stage('timing extract', timing.extract, fn, df.ResponseId, index)
+        df_eval = stage('timing join', timing.join, df_eval, times, ['Page Submit'], ['time-on-case'])
+        results = stage('model fits', models, df_eval)
+        participants = df_eval.groupby('ResponseId').agg(
+            condition=('condition', 'first'), accuracy=('judgement', lambda s: (s == 'Yes').mean()),
+            **{c: (c, 'first') for c in scoring.CONSTRUCTS})
+        stage('comparisons', comparisons.compare, participants, ['accuracy'] + list(scoring.CONSTRUCTS))
+        stage('table export', write_tables, results, tmp)
+        stage('store', store.save, df_eval, os.path.join(tmp, 'store'))
+    out = pd.DataFrame(stage.results)
+    out.insert(0, 'participants', n)
+    return out
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--csv', default=None, help='also write the results to this file')
+    args = parser.parse_args()
+    build.RECORD = False
+    warnings.simplefilter('ignore')
+
+    results = []
+    for n in args.sizes:
+        results.append(run(n))
+        print(results[-1].to_string(index=False, float_format='%.3f'), flush=True)
+    results = pd.concat(results, ignore_index=True)
+    print(results.pivot(index='stage', columns='participants', values='seconds').reindex(results.stage.unique())
+          .to_string(float_format='%.3f'))
+    if args.csv: results.to_csv(args.csv, index=False)
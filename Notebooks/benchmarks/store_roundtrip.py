@@ -0,0 +1,62 @@
+"""Round trip of the columnar hand-off: store.save followed by store.load.
+
+Run from the Notebooks folder: python benchmarks/store_roundtrip.py [--participants 1000 100000]
+Checks that a long-form frame with numpy, categorical, text and extension columns (nullable
+Int64/boolean/Float64 with NA, tz-aware datetimes with NaT) comes back unchanged, with and without
+memory mapping, and reports the time of each.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import store
+
+
+def data(n, rng, cases=20):
+    na = rng.random(n) < 0.1
+    participants = pd.DataFrame({
+        'ResponseId': [f'R_{i:08d}' for i in range(n)],
+        'condition': rng.integers(1, 5, n).astype(float),
+        'site': pd.Categorical(rng.choice(['a', 'b', 'c'], n)),
+        'RecordedDate': pd.Timestamp('2024-11-21') + pd.to_timedelta(rng.integers(0, 60 * 86400, n), unit='s'),
+        'age': pd.array(np.where(na, None, rng.integers(20, 70, n)), dtype='Int64'),
+        'consent': pd.array(np.where(na, None, rng.random(n) < 0.9), dtype='boolean'),
+        'score': pd.array(np.where(na, None, rng.normal(50, 10, n)), dtype='Float64'),
+        'local time': pd.Series(pd.Timestamp('2024-11-21', tz='Europe/Berlin')
+                                + pd.to_timedelta(rng.integers(0, 60 * 86400, n), unit='s')).where(~na),
+    })
+    facts = pd.DataFrame({'ResponseId': np.repeat(participants.ResponseId.values, cases),
+                          'question': np.tile([f'question_{i + 1}' for i in range(cases)], n),
+                          'answer': pd.Series(rng.choice(['pneumonia', 'fracture'], n * cases)).where(rng.random(n * cases) > 0.1),
+                          'judgement': pd.Series(rng.choice(['Yes', 'No', 'Partial'], n * cases)).where(rng.random(n * cases) > 0.1),
+                          'time-on-case': rng.lognormal(3.8, 0.7, n * cases)})
+    return facts.merge(participants, on='ResponseId', how='left')
+
+def check(df, out):
+    # with categorical=False, categorical columns come back as plain values
+    pd.testing.assert_frame_equal(out[list(df.columns)], df, check_categorical=False)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--participants', type=int, nargs='+', default=[1000, 100000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for n in args.participants:
+        df = data(n, rng)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'store')
+            t = time.perf_counter()
+            store.save(df, path)
+            t_save = time.perf_counter() - t
+            for mmap in [True, False]:
+                t = time.perf_counter()
+                out = store.load(path, mmap=mmap, categorical=False)
+                t_load = time.perf_counter() - t
+                check(df.assign(site=df.site.astype(str)), out)
+        print(f'{n:7d} participants ({len(df)} rows)  save {t_save:6.3f} s  load {t_load:6.3f} s  round trip ok')
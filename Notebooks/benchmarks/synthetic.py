@@ -0,0 +1,152 @@
+"""Synthetic Qualtrics exports with the column schema of ../Data/raw_data.csv.
+
+Run from the Notebooks folder: python benchmarks/synthetic.py N [--out FILE] [--seed SEED]
+
+The three header rows are copied from the real export. Each synthetic participant starts from a
+real donor response of the same condition, which keeps the missing-data pattern of the other
+blocks. Identifiers, dates, inclusion-filter fields, answers, page timers and questionnaire items
+are then drawn anew:
+  - answers are drawn from the real answers to the same case and condition (keeping their
+    frequencies) or, with probability LLM_SHARE, from GROUND_TRUTHS, DIAGNOSES_GPT and DD_GPT
+    (the LLM strings only in the conditions that showed them)
+  - Likert items (Q17, Q19, Q21, Q809) share a latent score per participant and construct
+  - a fraction of rows fails a filter (test data, no consent, unfinished, attention check, duplicate ui)
+"""
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+NOTEBOOKS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, NOTEBOOKS)
+import survey
+import preprocessing
+import timing
+from utils.cases import GROUND_TRUTHS, DIAGNOSES_GPT, DD_GPT
+
+
+RAW = os.path.join(NOTEBOOKS, '../Data/raw_data.csv')
+# export condition code -> name in DIAGNOSES_GPT / DD_GPT
+CONDITIONS = {1: 'control', 2: 'standard', 3: 'chain-of-thought', 4: 'differential'}
+LIKERT = ['Q17_', 'Q19_', 'Q21_', 'Q809_']
+LLM_SHARE = 0.2
+# share of rows failing each filter
+FAILURES = {'launch': 0.02, 'consent': 0.03, 'finished': 0.05, 'attention check': 0.03, 'duplicates': 0.02}
+
+def read_header(fn=RAW):
+    # the three header lines (names, question text, import ids) as raw text; the text contains newlines
+    with open(fn, encoding='utf-8-sig', newline='') as f:
+        data = f.read(1 << 22)
+    pos, quoted, lines = 0, False, 0
+    while lines < 3:
+        c = data[pos]
+        if c == '"': quoted = not quoted
+        elif c == '\n' and not quoted: lines += 1
+        pos += 1
+    return data[:pos]
+
+class Generator:
+    def __init__(self, fn=RAW, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.header = read_header(fn)
+        self.index = survey.get_index(fn)
+        self.columns = list(self.index.index)
+        real = pd.read_csv(fn, skiprows=[1, 2], encoding='utf-8-sig', low_memory=False)
+        real.columns = self.columns
+        self.donors = {c: real[(real.condition == c) & (real.Finished == 1)] for c in CONDITIONS}
+
+        _, real_long, _ = preprocessing.filter_and_melt(fn)
+        real_long['question'] = survey.lookup(real_long.question, self.index)
+        self.answers, self.llm_answers = {}, {}
+        for c, name in CONDITIONS.items():
+            for q, truth in GROUND_TRUTHS.items():
+                real_answers = real_long.answer[(real_long.question == q) & (real_long.condition == c)]
+                llm = [truth, truth.lower()]
+                llm += [d['diagnosis'] for d in DIAGNOSES_GPT if d['question'] == q and d['condition'] == name]
+                llm += [x for d in DD_GPT if d['question'] == q and d['condition'] == name for x in d['diagnosis']]
+                self.answers[(c, q)] = np.array(list(real_answers) or llm, dtype=object)
+                self.llm_answers[(c, q)] = np.array(llm, dtype=object)
+
+    def answer_columns(self, code):
+        cols = survey.select(self.index, item='text', condition=timing_name(code))
+        return dict(zip(cols.question.astype(str), cols.index))
+
+    def timer_columns(self, code):
+        return survey.select(self.index, item=['timer', 'page time'], condition=timing_name(code))
+
+    def chunk(self, n, start=0):
+        rng = self.rng
+        codes = rng.integers(1, 5, n)
+        df = pd.concat([self.donors[c].sample(int((codes == c).sum()), replace=True, random_state=rng)
+                        for c in CONDITIONS], ignore_index=True)
+        df = df.sample(frac=1, random_state=rng).reset_index(drop=True)
+        codes = df.condition.astype(int).values
+
+        # identifiers and dates
+        df['ResponseId'] = [f'R_syn{start + i:012d}' for i in range(n)]
+        start_date = preprocessing.STUDY_LAUNCH + pd.to_timedelta(rng.uniform(0, 60 * 86400, n), unit='s')
+        duration = rng.lognormal(7.3, 0.5, n).astype(int)
+        df['StartDate'] = start_date.floor('s')
+        df['EndDate'] = (start_date + pd.to_timedelta(duration, unit='s')).floor('s')
+        df['RecordedDate'] = df['EndDate']
+        df['Duration (in seconds)'] = duration
+        df['ui'] = [f'u{start + i}' for i in range(n)]
+
+        # inclusion filters
+        fail = {k: rng.random(n) < p for k, p in FAILURES.items()}
+        df.loc[fail['launch'], 'StartDate'] = preprocessing.STUDY_LAUNCH - pd.Timedelta(days=7)
+        df['Q3'] = np.where(fail['consent'], 2, 1)
+        df['Finished'] = np.where(fail['finished'], 0, 1)
+        df['Q19_7'] = np.where(codes == 1, np.nan, np.where(fail['attention check'], 3, 5))
+        dup = np.flatnonzero(fail['duplicates'])
+        df.loc[dup, 'ui'] = df.ui.values[rng.integers(0, n, len(dup))]
+
+        # Likert items: a latent score per participant and construct plus item noise
+        for prefix in LIKERT:
+            items = [c for c in self.columns if c.startswith(prefix) and c != 'Q19_7' and self.index.item[c] == 'matrix']
+            latent = rng.normal(4, 1.2, (n, 1))
+            values = np.clip(np.rint(latent + rng.normal(0, 0.8, (n, len(items)))), 1, 7)
+            df[items] = np.where(df[items].isna(), np.nan, values)
+
+        # answers and timers of the participant's condition only
+        for code in CONDITIONS:
+            rows = np.flatnonzero(codes == code)
+            for q, col in self.answer_columns(code).items():
+                real, llm = self.answers[(code, q)], self.llm_answers[(code, q)]
+                df.loc[rows, col] = np.where(rng.random(len(rows)) < LLM_SHARE,
+                                             llm[rng.integers(0, len(llm), len(rows))],
+                                             real[rng.integers(0, len(real), len(rows))])
+            timers = self.timer_columns(code)
+            for case in timers.case.unique():
+                cols = timers[timers.case == case]
+                submit = rng.lognormal(3.8, 0.7, len(rows))
+                first = submit * rng.uniform(0.05, 0.5, len(rows))
+                metrics = {'First Click': first, 'Last Click': first + (submit - first) * rng.uniform(0.5, 1, len(rows)),
+                           'Page Submit': submit, 'Click Count': rng.poisson(6, len(rows)),
+                           'Page Time': np.rint((submit + rng.uniform(0, 1, len(rows))) * 1000)}
+                for col, metric in zip(cols.index, cols.metric):
+                    df.loc[rows, col] = np.round(metrics[metric], 3)
+        return df
+
+    def write(self, n, fn, chunksize=10000):
+        """Write an export with n participants to fn, generated in chunks of `chunksize` rows."""
+        with open(fn, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write(self.header)
+            for start in range(0, n, chunksize):
+                self.chunk(min(chunksize, n - start), start).to_csv(
+                    f, header=False, index=False, date_format='%Y-%m-%d %H:%M:%S', lineterminator='\n')
+        return fn
+
+def timing_name(code):
+    return {v: k for k, v in timing.CONDITION_CODES.items()}[code]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('n', type=int)
+    parser.add_argument('--out', default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    out = args.out or os.path.join(NOTEBOOKS, f'../Data/.cache/synthetic-{args.n}.csv')
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    print(Generator(seed=args.seed).write(args.n, out))
@@ -0,0 +1,160 @@
+import os
+import json
+import pickle
+import inspect
+import hashlib
+import concurrent.futures
+import pandas as pd
+
+
+MANIFEST = '../Results/manifest.json'
+PATHS = {'tex': '../Results/Tex/{}.tex', 'plot': '../Results/Plots/{}.pdf'}
+# set to False in worker processes, only the main process writes the manifest
+RECORD = True
+
+### manifest
+def load_manifest(fn=MANIFEST):
+    if not os.path.exists(fn): return {'order': [], 'artifacts': {}}
+    with open(fn) as f:
+        return json.load(f)
+
+def save_manifest(manifest, fn=MANIFEST):
+    try:
+        tmp = fn + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, fn)
+    except FileNotFoundError:
+        pass
+
+def record(name, kind='tex', key=None, fn=MANIFEST):
+    """Add an artifact to the persisted manifest.
+
+    New artifacts are appended, recorded ones keep their place, so the order does not depend on
+    the order in which cells are run. Build.run and prune set the order and drop the entries of
+    renamed or dropped artifacts.
+    """
+    record_many([name], kind, key, fn)
+
+def record_many(names, kind='tex', key=None, fn=MANIFEST):
+    # one read and write of the manifest for a batch of artifacts
+    if not RECORD: return
+    manifest = load_manifest(fn)
+    for name in names:
+        if name not in manifest['order']: manifest['order'].append(name)
+        entry = manifest['artifacts'].setdefault(name, {})
+        entry.update({'kind': kind, 'path': PATHS[kind].format(name)})
+        if key is not None: entry['key'] = key
+    save_manifest(manifest, fn)
+
+def prune(names, kind=None, fn=MANIFEST):
+    """Keep only the artifacts in `names` in the manifest, in the order of `names`.
+
+    With `kind`, artifacts of other kinds are kept. E.g. build.prune(utils.order_of_supplements, 'tex')
+    after running all cells in order drops the tables of an earlier version of the notebook from
+    the supplement and takes the order of the cells.
+    """
+    if not RECORD: return
+    manifest = load_manifest(fn)
+    artifacts = manifest['artifacts']
+    names = [n for n in dict.fromkeys(names) if n in artifacts]
+    if kind is not None: names += [n for n in manifest['order'] if artifacts[n]['kind'] != kind and n not in names]
+    manifest = {'order': names, 'artifacts': {n: artifacts[n] for n in names}}
+    save_manifest(manifest, fn)
+
+def supplement_order(fn=MANIFEST):
+    manifest = load_manifest(fn)
+    return [n for n in manifest['order'] if manifest['artifacts'][n]['kind'] == 'tex']
+
+### hashing of artifact inputs
+def hash_value(o, h=None):
+    if h is None: h = hashlib.sha256()
+    if isinstance(o, (pd.DataFrame, pd.Series, pd.Index)):
+        h.update(pd.util.hash_pandas_object(o).values.tobytes())
+        h.update(repr(list(o.columns) if isinstance(o, pd.DataFrame) else o.name).encode())
+    elif isinstance(o, dict):
+        for k, v in o.items():
+            hash_value(k, h); hash_value(v, h)
+    elif isinstance(o, (list, tuple)):
+        for v in o: hash_value(v, h)
+    elif callable(o):
+        h.update(f'{o.__module__}.{o.__qualname__}'.encode())
+        try: h.update(inspect.getsource(o).encode())
+        except (OSError, TypeError): pass
+    else:
+        try: h.update(pickle.dumps(o))
+        except Exception: h.update(repr(o).encode())
+    return h
+
+def _init_worker():
+    global RECORD
+    RECORD = False
+    # figures are only written to files in workers
+    import matplotlib
+    matplotlib.use('Agg')
+
+### build graph
+class Build:
+    """Figures and tables of the results, rebuilt only when their inputs change.
+
+    Each artifact is a function that writes one file (e.g. by calling save_plot or save_tex with
+    the artifact's name), together with its arguments. Its key hashes the function's source,
+    the arguments and the data; artifacts whose key and output file are unchanged are skipped,
+    stale ones are rebuilt in worker processes. Functions defined in a notebook cannot be sent to
+    worker processes and run in the main process.
+    """
+    def __init__(self, manifest=MANIFEST, n_jobs=None):
+        self.manifest_fn = manifest
+        self.n_jobs = n_jobs
+        self.artifacts = {}
+
+    def add(self, name, func, *args, kind='tex', **kwargs):
+        self.artifacts[name] = (kind, func, args, kwargs)
+        return name
+
+    def key(self, name):
+        kind, func, args, kwargs = self.artifacts[name]
+        return hash_value([kind, func, args, kwargs]).hexdigest()[:16]
+
+    def stale(self, force=False):
+        manifest = load_manifest(self.manifest_fn)['artifacts']
+        out = []
+        for name, (kind, *_) in self.artifacts.items():
+            entry = manifest.get(name, {})
+            if force or entry.get('key') != self.key(name) or not os.path.exists(PATHS[kind].format(name)):
+                out.append(name)
+        return out
+
+    def run(self, force=False, consolidate=True, prune=True):
+        """Rebuild stale artifacts, update the manifest and reassemble the supplement.
+
+        The manifest takes the registration order of this build; with prune, artifacts that are
+        not registered in it are dropped from the manifest (and the supplement).
+        """
+        todo = self.stale(force)
+        local = [n for n in todo if self.artifacts[n][1].__module__ == '__main__' or self.n_jobs == 1]
+        remote = [n for n in todo if n not in local]
+        pool, futures = None, []
+        if remote:
+            pool = concurrent.futures.ProcessPoolExecutor(self.n_jobs, initializer=_init_worker)
+            futures = [pool.submit(func, *args, **kwargs) for _, func, args, kwargs in map(self.artifacts.get, remote)]
+        try:
+            for _, func, args, kwargs in map(self.artifacts.get, local):
+                func(*args, **kwargs)
+            for f in futures: f.result()
+        finally:
+            if pool is not None: pool.shutdown()
+
+        manifest = load_manifest(self.manifest_fn)
+        before = [n for n in manifest['order'] if manifest['artifacts'][n]['kind'] == 'tex']
+        others = [] if prune else [n for n in manifest['order'] if n not in self.artifacts]
+        if prune: manifest['artifacts'] = {}
+        manifest['order'] = list(self.artifacts) + others
+        for name, (kind, *_) in self.artifacts.items():
+            manifest['artifacts'][name] = {'kind': kind, 'path': PATHS[kind].format(name), 'key': self.key(name)}
+        save_manifest(manifest, self.manifest_fn)
+        reordered = supplement_order(self.manifest_fn) != before
+        if consolidate and (reordered or any(self.artifacts[n][0] == 'tex' for n in todo)):
+            from utils import consolidate_tex
+            consolidate_tex()
+        return todo
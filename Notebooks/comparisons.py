@@ -0,0 +1,167 @@
+import itertools
+import warnings
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+
+TESTS = ['welch', 'mwu', 'proportion']
+CORRECTIONS = ['holm', 'bh']
+
+### sufficient statistics
+def summarize(df, outcomes, group='condition', order=None):
+    """n, mean and variance per group (rows) and outcome (columns) from a single groupby."""
+    agg = df.groupby(group, observed=True, sort=False)[outcomes].agg(['count', 'mean', 'var'])
+    if order is None: order = list(df[group].cat.categories) if df[group].dtype == 'category' else sorted(agg.index)
+    agg = agg.reindex(order)
+    return {s: agg.xs(s, axis=1, level=1)[outcomes] for s in ['count', 'mean', 'var']}
+
+def value_counts(x, groups, n_groups):
+    # counts of each distinct value per group (groups x values), values in ascending order
+    codes, uniques = pd.factorize(x, sort=True)
+    # the flat index groups x values exceeds the small integer types of categorical codes
+    codes, groups = codes.astype(np.intp), np.asarray(groups, dtype=np.intp)
+    valid = (codes >= 0) & (groups >= 0)
+    flat = np.bincount(groups[valid] * len(uniques) + codes[valid], minlength=n_groups * len(uniques))
+    return flat.reshape(n_groups, len(uniques)).astype(float)
+
+### tests on all pairs at once; arrays are groups x groups (x outcomes), entry [a, b] compares a with b
+def pvalue(dist, stat, alternative, *args):
+    if alternative == 'less': return dist.cdf(stat, *args)
+    if alternative == 'greater': return dist.sf(stat, *args)
+    if alternative == 'two-sided': return 2 * dist.sf(np.abs(stat), *args)
+    raise ValueError(f'Unknown alternative {alternative}')
+
+def welch(n, mean, var, alternative='two-sided'):
+    se2 = var / n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = (mean[:, None] - mean[None]) / np.sqrt(se2[:, None] + se2[None])
+        df = (se2[:, None] + se2[None]) ** 2 / (se2[:, None] ** 2 / (n[:, None] - 1) + se2[None] ** 2 / (n[None] - 1))
+    return t, df, pvalue(stats.t, t, alternative, df)
+
+def proportion(n, mean, alternative='two-sided'):
+    # two-sample z-test with the pooled proportion, as statsmodels' proportions_ztest
+    pooled = (n[:, None] * mean[:, None] + n[None] * mean[None]) / (n[:, None] + n[None])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (mean[:, None] - mean[None]) / np.sqrt(pooled * (1 - pooled) * (1 / n[:, None] + 1 / n[None]))
+    return z, np.full_like(z, np.nan), pvalue(stats.norm, z, alternative)
+
+def mannwhitney(counts, alternative='two-sided'):
+    """Mann-Whitney U of all pairs from the value counts per group (normal approximation with tie
+    and continuity correction, as scipy's mannwhitneyu(method='asymptotic'))."""
+    n = counts.sum(axis=1)
+    below = np.cumsum(counts, axis=1) - counts
+    # U[a, b]: pairs with a > b, ties count half
+    U = counts @ (below + counts / 2).T
+    n1, n2 = n[:, None], n[None]
+    # sum of t^3 - t over the tied values of the pooled pair, expanded as (c_a + c_b)^3
+    c2, c3 = counts ** 2, (counts ** 3).sum(axis=1)
+    ties = c3[:, None] + c3[None] + 3 * (c2 @ counts.T + counts @ c2.T) - n1 - n2
+    N = n1 + n2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        s = np.sqrt(n1 * n2 / 12 * ((N + 1) - ties / (N * (N - 1))))
+        mu = n1 * n2 / 2
+        if alternative == 'greater': p = stats.norm.sf((U - mu - 0.5) / s)
+        elif alternative == 'less': p = stats.norm.sf((n1 * n2 - U - mu - 0.5) / s)
+        elif alternative == 'two-sided': p = 2 * stats.norm.sf((np.maximum(U, n1 * n2 - U) - mu - 0.5) / s)
+        else: raise ValueError(f'Unknown alternative {alternative}')
+    # no test with an empty group, as scipy
+    empty = (n1 == 0) | (n2 == 0)
+    return np.where(empty, np.nan, U), np.full_like(U, np.nan), np.where(empty, np.nan, np.clip(p, 0, 1))
+
+### multiple testing
+def holm(p):
+    order = np.argsort(p)
+    m = len(p)
+    adj = np.maximum.accumulate(np.minimum((m - np.arange(m)) * p[order], 1))
+    out = np.empty(m)
+    out[order] = adj
+    return out
+
+def bh(p):
+    order = np.argsort(p)
+    m = len(p)
+    adj = np.minimum.accumulate((m / np.arange(m, 0, -1) * p[order[::-1]]))[::-1]
+    out = np.empty(m)
+    out[order] = np.minimum(adj, 1)
+    return out
+
+def correct(results, method='holm', family=['outcome', 'test']):
+    """Adjusted p-values within each family of tests (default: the pairs of one outcome and test)."""
+    func = {'holm': holm, 'bh': bh}[method]
+    p = results.p.fillna(1)
+    return results.p.where(results.p.isna(), p.groupby([results[c] for c in family]).transform(lambda s: func(s.values)))
+
+### battery
+def compare(df, outcomes, group='condition', order=None, pairs=None, tests=TESTS, alternative='two-sided',
+            correction='holm', family=['outcome', 'test']):
+    """All pairwise comparisons of the groups for each outcome, as a tidy table.
+
+    Welch t-tests and proportion z-tests are computed from the n, mean and variance per group;
+    Mann-Whitney tests from the value counts per group. Proportion tests are only run for binary
+    (0/1) outcomes. 'less' tests group1 < group2 like one_sided_ttest. By default, all pairs of
+    `order` (the groups, in category or sorted order) are compared.
+    """
+    if not isinstance(outcomes, list): outcomes = [outcomes]
+    summary = summarize(df, outcomes, group, order)
+    order = list(summary['count'].index)
+    if pairs is None: pairs = list(itertools.combinations(order, 2))
+    a = np.array([order.index(g1) for g1, _ in pairs], dtype=int)
+    b = np.array([order.index(g2) for _, g2 in pairs], dtype=int)
+    n, mean, var = (summary[s].to_numpy(dtype=float) for s in ['count', 'mean', 'var'])
+
+    results = []
+    def add(test, outcome_idx, stat, dof, p):
+        results.append(pd.DataFrame({
+            'outcome': np.repeat(np.array(outcomes)[outcome_idx], len(pairs)),
+            'test': test, 'group1': [g1 for g1, _ in pairs] * len(outcome_idx),
+            'group2': [g2 for _, g2 in pairs] * len(outcome_idx),
+            'n1': n[a][:, outcome_idx].T.ravel(), 'n2': n[b][:, outcome_idx].T.ravel(),
+            'mean1': mean[a][:, outcome_idx].T.ravel(), 'mean2': mean[b][:, outcome_idx].T.ravel(),
+            'statistic': stat, 'df': dof, 'p': p}))
+
+    everything = np.arange(len(outcomes))
+    if 'welch' in tests:
+        t, dof, p = welch(n, mean, var, alternative)
+        add('welch', everything, *(x[a, b].T.ravel() for x in (t, dof, p)))
+    if 'proportion' in tests:
+        binary = np.array([df[o].dropna().isin([0, 1]).all() for o in outcomes])
+        if binary.any():
+            z, dof, p = proportion(n[:, binary], mean[:, binary], alternative)
+            add('proportion', everything[binary], *(x[a, b].T.ravel() for x in (z, dof, p)))
+    if 'mwu' in tests:
+        codes = pd.Categorical(df[group], categories=order).codes
+        stat = [mannwhitney(value_counts(df[o].to_numpy(), codes, len(order)), alternative) for o in outcomes]
+        add('mwu', everything, *(np.concatenate([x[a, b] for x in xs]) for xs in zip(*stat)))
+
+    results = pd.concat(results, ignore_index=True)
+    if correction is not None:
+        results['p_adj'] = correct(results, correction, family)
+    return results
+
+### output
+def annotations(results, outcome, test='welch', pairs=None, adjusted=True):
+    """{(group1, group2): (statistic, p)} for annotate_tests, in the order of `pairs` if given.
+
+    Pairs without a p-value (e.g. an empty or constant group) are left out with a warning, as
+    annotate_tests would show them as significant.
+    """
+    sel = results[(results.outcome == outcome) & (results.test == test)].set_index(['group1', 'group2'])
+    if pairs is None: pairs = list(sel.index)
+    p = 'p_adj' if adjusted and 'p_adj' in sel else 'p'
+    missing = [pair for pair in pairs if np.isnan(sel.at[pair, p])]
+    if missing: warnings.warn(f'No {test} p-value for {outcome} in {missing}, not annotated')
+    return {pair: (sel.at[pair, 'statistic'], sel.at[pair, p]) for pair in pairs if pair not in missing}
+
+def table(results, test='welch', labels=None):
+    """Results of one test as a table for save_tabtex (one row per outcome and comparison)."""
+    out = results[results.test == test].copy()
+    if labels is not None:
+        for c in ['group1', 'group2']: out[c] = out[c].map(lambda g: labels.get(g, g))
+    out['Comparison'] = out.group1.astype(str) + ' vs. ' + out.group2.astype(str)
+    columns = {'outcome': 'Outcome', 'Comparison': 'Comparison', 'mean1': 'Mean 1', 'mean2': 'Mean 2',
+               'statistic': {'welch': '$t$', 'mwu': '$U$', 'proportion': '$z$'}[test], 'df': 'df',
+               'p': '$P$', 'p_adj': '$P$ (adj.)'}
+    if test != 'welch': del columns['df']
+    columns = {k: v for k, v in columns.items() if k in out}
+    return out[list(columns)].rename(columns, axis=1).set_index(['Outcome', 'Comparison'])
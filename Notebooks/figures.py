@@ -0,0 +1,89 @@
+import os
+import concurrent.futures
+import pandas as pd
+import build
+
+
+STYLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'style.mplstyle')
+PLOTS_DIR = '../Results/Plots'
+FORMATS = ['pdf', 'png']
+# kind -> draw function(ax, data, **kwargs), see register
+KINDS = {}
+
+def register(kind):
+    """Register a draw function for figure specs of this kind; it draws on the given Axes only."""
+    def wrap(func):
+        KINDS[kind] = func
+        return func
+    return wrap
+
+def spec(name, kind, data, figsize=None, **kwargs):
+    # a figure to render: its file name, the kind of figure, the data and the draw arguments
+    return {'name': name, 'kind': kind, 'data': data, 'figsize': figsize, 'kwargs': kwargs}
+
+def expand(s, by):
+    """One spec per level of `by` (e.g. site, wave or a subgroup), named <name>-<level>."""
+    return [dict(s, name=f"{s['name']}-{level}", data=d) for level, d in s['data'].groupby(by, observed=True)]
+
+### draw functions
+def get_order(data, x, order=None):
+    if order is not None: return list(order)
+    return list(data[x].cat.categories) if data[x].dtype == 'category' else sorted(data[x].dropna().unique())
+
+@register('bar')
+def draw_bar(ax, data, y, x='condition', order=None, tests=None, ymax=None, color='C0', annotate_n=True, **labs):
+    import seaborn as sns
+    from utils.plotting import bar_annotate_n, format_labs, annotate_tests
+    order = get_order(data, x, order)
+    sns.barplot(data=data, x=x, y=y, order=order, color=color, ax=ax)
+    if annotate_n: bar_annotate_n(data.groupby(x, observed=True).size().reindex(order), ax=ax)
+    format_labs(ax=ax, **labs)
+    if tests is not None: annotate_tests(tests, order, ymax if ymax is not None else ax.get_ylim()[1], ax=ax)
+
+@register('box')
+def draw_box(ax, data, y, x='condition', order=None, tests=None, ymax=None, color='C0', **labs):
+    import seaborn as sns
+    from utils.plotting import format_labs, annotate_tests
+    order = get_order(data, x, order)
+    sns.boxplot(data=data, x=x, y=y, order=order, color=color, ax=ax)
+    format_labs(ax=ax, **labs)
+    if tests is not None: annotate_tests(tests, order, ymax if ymax is not None else ax.get_ylim()[1], ax=ax)
+
+### rendering
+def _init_worker(style=STYLE):
+    # Agg backend and the style are set up once per process
+    build._init_worker()
+    import matplotlib.pyplot as plt
+    plt.style.use(style)
+
+def render_one(s, formats=FORMATS, outdir=PLOTS_DIR):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=s['figsize'])
+    try:
+        KINDS[s['kind']](ax, s['data'], **s['kwargs'])
+        paths = []
+        for fmt in formats:
+            paths.append(os.path.join(outdir, f"{s['name']}.{fmt}"))
+            fig.savefig(paths[-1])
+    finally:
+        plt.close(fig)
+    return paths
+
+def render(specs, formats=FORMATS, outdir=PLOTS_DIR, n_jobs=None, style=STYLE):
+    """Render independent figure specs into `outdir`, spread over `n_jobs` processes.
+
+    Only the data of each spec is sent to the workers, so specs should carry the columns they plot.
+    Returns the written files per figure; pdf figures are recorded in the build manifest.
+    """
+    if not os.path.isdir(outdir): raise FileNotFoundError(f'Create "{outdir}" to save figure files')
+    if n_jobs == 1 or len(specs) <= 1:
+        import matplotlib.pyplot as plt
+        with plt.style.context(style):
+            paths = [render_one(s, formats, outdir) for s in specs]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(n_jobs, initializer=_init_worker, initargs=(style,)) as pool:
+            futures = [pool.submit(render_one, s, formats, outdir) for s in specs]
+            paths = [f.result() for f in futures]
+    if 'pdf' in formats and os.path.abspath(outdir) == os.path.abspath(PLOTS_DIR):
+        build.record_many([s['name'] for s in specs], 'plot')
+    return pd.DataFrame(paths, index=[s['name'] for s in specs], columns=formats)
@@ -0,0 +1,87 @@
+import os
+import concurrent.futures
+import numpy as np
+import pandas as pd
+from PIL import Image
+import loader
+
+
+CASES_DIR = '../Data/Cases'
+IMAGE_ANALYSIS = '../Data/image-analysis.xlsx'
+IMAGE_CACHE = os.path.join(loader.CACHE_DIR, 'images')
+# image ids in the order of the cases in the survey (question_1, ..., question_20)
+CASE_IDS = [2, 3, 5, 6, 8, 10, 11, 12, 14, 15, 17, 18, 21, 23, 26, 28, 29, 30, 32, 33]
+# name -> maximal (width, height); the aspect ratio is kept
+SIZES = {'thumbnail': (256, 256), 'preview': (1024, 1024)}
+CATEGORICAL = ['modality', 'body_region', 'field', 'contrast_media']
+
+### metadata
+def get_index(cases_dir=CASES_DIR, fn=IMAGE_ANALYSIS):
+    """One row per case (question_1, ...) with its image file, image-analysis tags, task and ground truth."""
+    from utils.cases import TASKS, GROUND_TRUTHS
+    analysis = loader.read_excel(fn).set_index('ID')
+    index = pd.DataFrame({'ID': CASE_IDS}, index=pd.Index([f'question_{i + 1}' for i in range(len(CASE_IDS))],
+                                                          name='question'))
+    index['path'] = [os.path.join(cases_dir, f'{i}.jpeg') for i in CASE_IDS]
+    index = index.join(analysis, on='ID')
+    # the header is read without decoding the image
+    index['width'], index['height'] = zip(*[image_size(p) for p in index.path])
+    index['task'] = index.index.map(TASKS)
+    index['ground_truth'] = index.index.map(GROUND_TRUTHS)
+    for col in CATEGORICAL: index[col] = index[col].astype('category')
+    return index
+
+def image_size(path):
+    with Image.open(path) as im:
+        return im.size
+
+def cache_name(path, suffix):
+    # keyed on the image content, so replaced images are not served from the cache
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(IMAGE_CACHE, f'{stem}-{loader.file_hash(path)[:12]}-{suffix}')
+
+### decoded pixels
+def decode(path, cache=True):
+    """RGB pixels of an image as a uint8 array, memory-mapped from the cache after the first decode."""
+    fn = cache_name(path, 'rgb.npy')
+    if cache and os.path.exists(fn):
+        return np.load(fn, mmap_mode='r')
+    with Image.open(path) as im:
+        pixels = np.asarray(im.convert('RGB'))
+    if not cache: return pixels
+    os.makedirs(IMAGE_CACHE, exist_ok=True)
+    tmp = fn + '.tmp.npy'
+    np.save(tmp, pixels)
+    os.replace(tmp, fn)
+    return np.load(fn, mmap_mode='r')
+
+def get_pixels(index, questions=None):
+    """Decoded pixels per case, e.g. get_pixels(index[index.modality == 'mri'])."""
+    paths = index.path if questions is None else index.path[questions]
+    return {q: decode(p) for q, p in paths.items()}
+
+### thumbnails and previews
+def _render(path, out, size, quality):
+    with Image.open(path) as im:
+        im = im.convert('RGB')
+        im.thumbnail(size, Image.LANCZOS)
+        im.save(out + '.tmp', format='JPEG', quality=quality)
+    os.replace(out + '.tmp', out)
+    return out
+
+def render(index, sizes=SIZES, quality=85, n_jobs=None, force=False):
+    """Thumbnails and previews of all cases, rendered in worker processes and cached on disk.
+
+    Returns the file of each case (rows) and size (columns); existing files are not rendered again.
+    """
+    os.makedirs(IMAGE_CACHE, exist_ok=True)
+    out = pd.DataFrame({name: [cache_name(p, f'{name}.jpeg') for p in index.path] for name in sizes},
+                       index=index.index)
+    todo = [(p, out.at[q, name], sizes[name]) for q, p in index.path.items() for name in sizes
+            if force or not os.path.exists(out.at[q, name])]
+    if n_jobs == 1 or len(todo) <= 1:
+        for args in todo: _render(*args, quality)
+    elif todo:
+        with concurrent.futures.ProcessPoolExecutor(n_jobs) as pool:
+            for f in [pool.submit(_render, *args, quality) for args in todo]: f.result()
+    return out
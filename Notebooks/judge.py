@@ -0,0 +1,117 @@
+import os
+import json
+import random
+import asyncio
+import hashlib
+import warnings
+import concurrent.futures
+import pandas as pd
+from utils import PROMPT, TASKS, GROUND_TRUTHS
+
+
+CACHE_FN = '../Data/.cache/judge_verdicts.jsonl'
+
+### backends: async callables that take a prompt and return the model's reply
+def openai_backend(model='gpt-4o', base_url=None, api_key=None, temperature=0):
+    # base_url allows pointing the judge to a local stub server speaking the OpenAI API
+    from openai import AsyncOpenAI
+    client = AsyncOpenAI(base_url=base_url, api_key=api_key)
+    async def backend(prompt):
+        response = await client.chat.completions.create(
+            model=model, temperature=temperature, messages=[{'role': 'user', 'content': prompt}])
+        return response.choices[0].message.content
+    backend.name = f'openai:{model}'
+    return backend
+
+def anthropic_backend(model='claude-3-5-sonnet-latest', api_key=None, temperature=0, max_tokens=5):
+    from anthropic import AsyncAnthropic
+    client = AsyncAnthropic(api_key=api_key)
+    async def backend(prompt):
+        response = await client.messages.create(
+            model=model, temperature=temperature, max_tokens=max_tokens,
+            messages=[{'role': 'user', 'content': prompt}])
+        return response.content[0].text
+    backend.name = f'anthropic:{model}'
+    return backend
+
+### verdict cache
+def normalize(answer):
+    return str(answer).strip().lower()
+
+def get_prompt(question, answer):
+    return PROMPT.format(medical_question=TASKS[question], ground_truth=GROUND_TRUTHS[question], response=answer)
+
+def prompt_key(prompt, backend_name=''):
+    return hashlib.sha256(f'{backend_name}\n{prompt}'.encode()).hexdigest()
+
+def parse_verdict(reply):
+    reply = reply.strip().strip('.').lower()
+    if reply.startswith('yes'): return 'Yes'
+    if reply.startswith('no'): return 'No'
+    return None
+
+class VerdictCache:
+    """Append-only jsonl file of prompt hash -> verdict."""
+    def __init__(self, fn=CACHE_FN):
+        self.fn = fn
+        self.verdicts = {}
+        if fn is not None and os.path.exists(fn):
+            with open(fn) as f:
+                for line in f:
+                    o = json.loads(line)
+                    self.verdicts[o['key']] = o['verdict']
+
+    def __contains__(self, key): return key in self.verdicts
+    def __getitem__(self, key): return self.verdicts[key]
+
+    def add(self, key, verdict):
+        self.verdicts[key] = verdict
+        if self.fn is None: return
+        os.makedirs(os.path.dirname(self.fn), exist_ok=True)
+        with open(self.fn, 'a') as f:
+            f.write(json.dumps({'key': key, 'verdict': verdict}) + '\n')
+
+### grading
+async def ask(backend, prompt, semaphore, max_retries=5, backoff=1.0):
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                return parse_verdict(await backend(prompt))
+        except Exception as e:
+            if attempt == max_retries:
+                warnings.warn(f'Giving up on prompt after {max_retries + 1} attempts: {e!r}')
+                return None
+            # exponential backoff with jitter
+            await asyncio.sleep(backoff * 2 ** attempt * (1 + random.random()))
+
+async def agrade(df, backend, concurrency=8, cache=None, max_retries=5, backoff=1.0):
+    """Grade the answers in `df` (columns question, answer) and return one verdict per row.
+
+    Only unique (question, normalized answer) pairs are sent, and only if their prompt is not in the
+    verdict cache yet. Verdicts are 'Yes', 'No' or None if the reply could not be obtained or parsed.
+    """
+    if cache is None: cache = VerdictCache()
+    name = getattr(backend, 'name', '')
+    pairs = pd.DataFrame({'question': df['question'], 'answer': df['answer'].map(normalize)})
+    unique = pairs.drop_duplicates().reset_index(drop=True)
+    unique['key'] = [prompt_key(get_prompt(q, a), name) for q, a in zip(unique.question, unique.answer)]
+
+    todo = unique[~unique.key.map(cache.__contains__)].drop_duplicates('key')
+    semaphore = asyncio.Semaphore(concurrency)
+    async def run(q, a, key):
+        verdict = await ask(backend, get_prompt(q, a), semaphore, max_retries, backoff)
+        if verdict is not None: cache.add(key, verdict)
+    await asyncio.gather(*(run(q, a, key) for q, a, key in zip(todo.question, todo.answer, todo.key)))
+
+    unique['verdict'] = [cache[k] if k in cache else None for k in unique.key]
+    verdicts = pd.merge(pairs, unique, on=['question', 'answer'], how='left', validate='many_to_one')
+    return pd.Series(verdicts.verdict.values, index=df.index, name='judgement_llm')
+
+def grade(df, backend, **kwargs):
+    # asyncio.run cannot be nested in a running loop (e.g. Jupyter), use a worker thread there
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(agrade(df, backend, **kwargs))
+    with concurrent.futures.ThreadPoolExecutor(1) as pool:
+        return pool.submit(asyncio.run, agrade(df, backend, **kwargs)).result()
@@ -0,0 +1,80 @@
+import os
+import sys
+import inspect
+import hashlib
+import warnings
+import pandas as pd
+
+
+CACHE_DIR = '../Data/.cache'
+DATE_COLS = ['StartDate', 'EndDate', 'RecordedDate']
+
+### cache helpers
+def file_hash(fn, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(fn, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def reader_key(reader):
+    # the reader's name and its source (or the version of its package), so a changed parser is rerun
+    name = f'{reader.__module__}.{reader.__qualname__}'
+    try: version = inspect.getsource(reader)
+    except (OSError, TypeError):
+        version = getattr(sys.modules.get(reader.__module__.split('.')[0]), '__version__', '')
+    return name + version
+
+def cache_path(fn, reader=pd.read_excel, **kwargs):
+    # key on file content, the reader and its arguments, so that e.g. skiprows gets its own entry
+    key = hashlib.sha256((file_hash(fn) + reader_key(reader) + repr(sorted(kwargs.items()))).encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(fn))[0]
+    return os.path.join(CACHE_DIR, f'{stem}-{key}.pkl')
+
+def read_cached(fn, reader=pd.read_excel, **kwargs):
+    """Read `fn` with `reader` once and serve later calls from a typed pickle cache."""
+    path = cache_path(fn, reader, **kwargs)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+    with warnings.catch_warnings():
+        # openpyxl complains about the missing default style of Qualtrics exports
+        warnings.filterwarnings('ignore', message='Workbook contains no default style')
+        df = reader(fn, **kwargs)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_pickle(path)
+    except OSError:
+        warnings.warn(f'Could not write cache file {path}')
+    return df
+
+def clear_cache():
+    if not os.path.isdir(CACHE_DIR): return
+    for f in os.listdir(CACHE_DIR):
+        if f.endswith('.pkl'): os.remove(os.path.join(CACHE_DIR, f))
+
+### data sources
+def read_excel(fn, **kwargs):
+    return read_cached(fn, pd.read_excel, **kwargs)
+
+def csv_matches(fn, csv_fn):
+    # same columns and the same responses (row count and ResponseId set) as the workbook
+    header = read_excel(fn, nrows=0).columns
+    if list(pd.read_csv(csv_fn, nrows=0, encoding='utf-8-sig').columns) != list(header): return False
+    ids = read_excel(fn, skiprows=[1], usecols=['ResponseId']).ResponseId
+    csv_ids = pd.read_csv(csv_fn, skiprows=[1, 2], usecols=['ResponseId'], encoding='utf-8-sig').ResponseId
+    return len(ids) == len(csv_ids) and set(ids) == set(csv_ids)
+
+def get_export(fn='../Data/raw_data.xlsx', csv_fn='../Data/raw_data.csv'):
+    """The export to read: the csv when it is present and matches the workbook, else the workbook."""
+    if csv_fn is None or not os.path.exists(csv_fn): return fn
+    if csv_matches(fn, csv_fn): return csv_fn
+    warnings.warn(f'{csv_fn} does not match {fn} (columns, rows or ResponseIds), falling back to the workbook')
+    return fn
+
+def load_raw_data(fn='../Data/raw_data.xlsx', csv_fn='../Data/raw_data.csv'):
+    # The csv export carries the question text and the import ids as two extra header rows.
+    # It is used instead of the workbook when it matches the workbook, see get_export.
+    if get_export(fn, csv_fn) == csv_fn:
+        return read_cached(csv_fn, pd.read_csv, skiprows=[1, 2], encoding='utf-8-sig', low_memory=False,
+                           parse_dates=DATE_COLS)
+    return read_excel(fn, skiprows=[1])
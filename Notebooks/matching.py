@@ -0,0 +1,109 @@
+import re
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils import GROUND_TRUTHS, DIAGNOSES_GPT, DD_GPT
+
+
+# abbreviations not spelled out in the LLM diagnoses
+ABBREVIATIONS = {
+    'cjd': 'creutzfeldt jakob disease',
+    'mets': 'metastases',
+    'mai': 'mycobacterium avium intracellulare',
+    'sma': 'superior mesenteric artery',
+    'ccm': 'cerebral cavernous malformation',
+    'ihh': 'infantile hepatic hemangioma',
+}
+
+### normalization
+def get_abbreviations(diagnoses=DIAGNOSES_GPT + DD_GPT):
+    # collect "Long Name (ABBR)" pairs from the LLM diagnoses, e.g. PRES, SCD, LAM, GPA, MAC
+    abbreviations = {}
+    for o in diagnoses:
+        names = o['diagnosis'] if isinstance(o['diagnosis'], list) else [o['diagnosis']]
+        for name in names:
+            for long, abbr in re.findall(r"([\w' -]+?)\s*\((\w+)\)", name):
+                words, abbr = long.lower().split(), abbr.lower()
+                exact = words[-len(abbr):]
+                if len(exact) == len(abbr) and all(w[0] == a for w, a in zip(exact, abbr)):
+                    words = exact
+                else:
+                    # initials do not line up (e.g. GPA, LAM): longest tail starting with the first letter
+                    starts = [i for i in range(max(len(words) - len(abbr), 0), len(words)) if words[i][0] == abbr[0]]
+                    if not starts: continue
+                    words = words[starts[0]:]
+                abbreviations[abbr] = normalize(' '.join(words), {})
+    abbreviations.update(ABBREVIATIONS)
+    return abbreviations
+
+def normalize(answer, abbreviations=None):
+    if abbreviations is None: abbreviations = ABBREVIATIONS
+    s = str(answer).strip().lower()
+    s = s.replace('’', "'").replace('–', ' ').replace('-', ' ')
+    s = re.sub(r"'s\b", '', s)
+    s = re.sub(r'[^\w\s]', ' ', s)
+    return ' '.join(abbreviations.get(token, token) for token in s.split())
+
+### index
+class AnswerIndex:
+    """Per-question index over judged answers for resolving new answers by similarity.
+
+    Answers are normalized (punctuation, possessives, abbreviations) and compared by cosine
+    similarity of character n-gram tf-idf vectors. The confidence is the similarity to the best
+    matching reference answer of the same question; exact normalized matches score 1.
+    """
+    def __init__(self, references, ngram_range=(2, 4), abbreviations=None):
+        self.abbreviations = get_abbreviations() if abbreviations is None else abbreviations
+        refs = references[['question', 'answer', 'judgement']].dropna().copy()
+        refs['normalized'] = [normalize(a, self.abbreviations) for a in refs.answer]
+        self.references = refs.drop_duplicates(['question', 'normalized']).reset_index(drop=True)
+        self.vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=ngram_range)
+        self.vectors = self.vectorizer.fit_transform(self.references.normalized)
+        self.rows = self.references.groupby('question').indices
+
+    @classmethod
+    def from_judgements(cls, df_map, ground_truths=GROUND_TRUTHS, **kwargs):
+        # the ground truths are correct answers by definition
+        gt = pd.DataFrame({'question': list(ground_truths), 'answer': list(ground_truths.values()), 'judgement': 'Yes'})
+        return cls(pd.concat([df_map, gt], ignore_index=True), **kwargs)
+
+    def match(self, questions, answers):
+        """Return the best reference answer, its judgement and the confidence for each answer."""
+        questions = pd.Series(questions).reset_index(drop=True)
+        normalized = [normalize(a, self.abbreviations) for a in answers]
+        if not normalized: return pd.DataFrame({'match': [], 'judgement': [], 'confidence': []})
+        vectors = self.vectorizer.transform(normalized)
+        best = np.full(len(normalized), -1)
+        confidence = np.zeros(len(normalized))
+        for q, idx in questions.groupby(questions).indices.items():
+            if q not in self.rows: continue
+            ref_rows = self.rows[q]
+            # vectors are l2-normalized, the sparse product is the cosine similarity
+            sim = (vectors[idx] @ self.vectors[ref_rows].T).toarray()
+            best[idx] = ref_rows[sim.argmax(axis=1)]
+            confidence[idx] = sim.max(axis=1)
+        found = best >= 0
+        out = pd.DataFrame({'match': None, 'judgement': None, 'confidence': confidence})
+        out.loc[found, 'match'] = self.references.answer.values[best[found]]
+        out.loc[found, 'judgement'] = self.references.judgement.values[best[found]]
+        exact = found & (self.references.normalized.values[best.clip(0)] == np.array(normalized, dtype=object))
+        out.loc[exact, 'confidence'] = 1.0
+        return out
+
+    def resolve(self, df, threshold=0.9):
+        """Fill missing judgements in `df` from matches with a confidence of at least `threshold`.
+
+        Adds the columns `judgement_match` and `judgement_confidence`; rows that stay missing are
+        left for the LLM judge.
+        """
+        df = df.copy()
+        missing = df.judgement.isna().values
+        matches = self.match(df.question[missing], df.answer[missing])
+        resolved = (matches.confidence >= threshold).values
+        rows = df.index[missing][resolved]
+        df.loc[rows, 'judgement'] = matches.judgement.values[resolved]
+        df['judgement_match'] = None
+        df.loc[rows, 'judgement_match'] = matches.match.values[resolved]
+        df['judgement_confidence'] = np.nan
+        df.loc[df.index[missing], 'judgement_confidence'] = matches.confidence.values
+        return df
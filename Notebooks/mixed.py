@@ -0,0 +1,148 @@
+import os
+import hashlib
+import warnings
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import scipy.stats as stats
+from scipy.optimize import minimize
+from scipy.sparse.linalg import splu
+import resampling
+
+
+CACHE_DIR = '../Data/.cache'
+
+### model
+class CrossedLMM:
+    """Linear mixed model with crossed random intercepts, e.g. for participants and questions.
+
+    Follows the profiled (RE)ML formulation of lme4: for relative standard deviations theta, the
+    penalized least-squares system is solved with a sparse LU decomposition, so that fitting scales
+    with the number of non-zeros rather than with participants x questions.
+    """
+    def __init__(self, X, y, groups):
+        self.X, self.y = X, y
+        self.group_names = list(groups.columns)
+        self.levels, blocks = [], []
+        for g in self.group_names:
+            codes, uniques = pd.factorize(groups[g])
+            self.levels.append(len(uniques))
+            blocks.append(sp.csc_matrix((np.ones(len(codes)), (np.arange(len(codes)), codes)),
+                                        shape=(len(codes), len(uniques))))
+        self.Z = sp.hstack(blocks).tocsc()
+        self.ZtZ, self.ZtX, self.Zty = self.Z.T @ self.Z, sp.csc_matrix(self.Z.T @ X), self.Z.T @ y
+        self.XtX, self.Xty = X.T @ X, X.T @ y
+        self.n, self.p = X.shape
+
+    def solve(self, theta):
+        # penalized least squares for the relative covariance factor Lambda = diag(theta per group)
+        lam = sp.diags(np.repeat(theta, self.levels))
+        A = (lam @ self.ZtZ @ lam + sp.identity(self.ZtZ.shape[0])).tocsc()
+        LZtX = lam @ self.ZtX
+        M = sp.bmat([[A, LZtX], [LZtX.T, sp.csc_matrix(self.XtX)]]).tocsc()
+        lu = splu(M)
+        sol = lu.solve(np.concatenate([lam @ self.Zty, self.Xty]))
+        u, beta = sol[:-self.p], sol[-self.p:]
+        resid = self.y - self.X @ beta - self.Z @ (lam @ u)
+        r2 = resid @ resid + u @ u
+        logdet_M = np.log(np.abs(lu.U.diagonal())).sum()
+        return beta, u, r2, logdet_M, A, LZtX
+
+    def deviance(self, theta, reml=True):
+        beta, u, r2, logdet_M, A, LZtX = self.solve(theta)
+        if reml:
+            # log|M| = log|A| + log|X'X - X'Z Lambda A^-1 Lambda Z'X|
+            df = self.n - self.p
+            return logdet_M + df * (1 + np.log(2 * np.pi * r2 / df))
+        logdet_A = np.log(np.abs(splu(A).U.diagonal())).sum()
+        return logdet_A + self.n * (1 + np.log(2 * np.pi * r2 / self.n))
+
+    def fit(self, theta0, reml=True):
+        # the deviance is symmetric in theta; optimizing without bounds avoids getting stuck at the
+        # boundary, where its gradient vanishes
+        opt = minimize(self.deviance, theta0, args=(reml,), method='L-BFGS-B')
+        opt.x = np.abs(opt.x)
+        if not opt.success:
+            warnings.warn(f'Mixed model optimization did not converge: {opt.message}')
+        return opt
+
+### results
+class CrossedLMMResults:
+    """Fixed effects with z-tests and the variance components, with the statsmodels attributes
+    used by get_tabular (params, bse, pvalues, conf_int, aic, nobs)."""
+    def __init__(self, model, opt, names, reml=True):
+        theta = opt.x
+        beta, u, r2, _, A, LZtX = model.solve(theta)
+        df = model.n - model.p if reml else model.n
+        self.scale = r2 / df
+        # cov(beta) = scale * (X'X - X'Z Lambda A^-1 Lambda Z'X)^-1
+        schur = model.XtX - LZtX.T @ splu(A).solve(LZtX.toarray())
+        cov = self.scale * np.linalg.inv(schur)
+        self.params = pd.Series(beta, index=names)
+        self.bse = pd.Series(np.sqrt(np.diag(cov)), index=names)
+        self.tvalues = self.params / self.bse
+        self.pvalues = 2 * stats.norm.sf(np.abs(self.tvalues))
+        self.pvalues = pd.Series(self.pvalues, index=names)
+        self.vcomp = pd.Series(self.scale * theta ** 2, index=model.group_names)
+        self.nobs = model.n
+        self.converged = opt.success
+        self.reml = reml
+        # like statsmodels, likelihood-based criteria are only reported for ML fits
+        self.llf = -opt.fun / 2
+        self.aic = -2 * self.llf + 2 * (model.p + len(theta) + 1) if not reml else np.nan
+
+    def conf_int(self, alpha=0.05):
+        q = stats.norm.ppf(1 - alpha / 2)
+        return pd.concat([self.params - q * self.bse, self.params + q * self.bse], axis=1)
+
+    def get_add_info(self, labels=None):
+        # rows for get_tabular(add_info=...); numbers are printed as they are
+        if labels is None: labels = {g: f'Var. ({g})' for g in self.vcomp.index}
+        info = {labels[g]: v for g, v in self.vcomp.items()}
+        info['Residual var.'] = self.scale
+        info['Obs. ($N$)'] = 'nobs'
+        return info
+
+### fitting
+def data_key(df, target, features, groups, reml):
+    cols = [target] + features + groups
+    h = hashlib.sha256(pd.util.hash_pandas_object(df[cols], index=False).values.tobytes())
+    h.update(repr((target, features, groups, reml)).encode())
+    return h.hexdigest()[:16]
+
+def ols_start(df, target, features, groups):
+    # relative standard deviations from the group means of the OLS residuals of utils.fit
+    from utils import fit
+    resid = fit(df, target, features).resid
+    sigma2 = resid.var()
+    return np.array([np.sqrt(max(resid.groupby(df[g]).mean().var(), 1e-4 * sigma2) / sigma2) for g in groups])
+
+def fit_mixed(df, target, features, groups=['ResponseId', 'question'], reml=True, cache=True):
+    """Fit `target` ~ `features` with crossed random intercepts for `groups`.
+
+    Fits are cached on disk by formula and a hash of the used data.
+    """
+    if not isinstance(features, list): features = [features]
+    df = df.dropna(subset=[target] + features + groups)
+    path = os.path.join(CACHE_DIR, f'mixedlm-{data_key(df, target, features, groups, reml)}.pkl')
+    if cache and os.path.exists(path):
+        return pd.read_pickle(path)
+
+    X, y = resampling.get_design(df, target, features)
+    model = CrossedLMM(X.values, y.values, df[groups])
+    opt = model.fit(ols_start(df, target, features, groups), reml)
+    results = CrossedLMMResults(model, opt, X.columns, reml)
+    if cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        pd.to_pickle(results, path)
+    return results
+
+def fit_many(df, targets, features, groups=['ResponseId', 'question'], reml=True, n_jobs=None):
+    """Fit one model per target (e.g. correctness, cognitive-load, trust) in parallel processes."""
+    if n_jobs == 1:
+        return {t: fit_mixed(df, t, features, groups, reml) for t in targets}
+    cols = list(dict.fromkeys(targets + (features if isinstance(features, list) else [features]) + groups))
+    with concurrent.futures.ProcessPoolExecutor(n_jobs) as pool:
+        futures = {t: pool.submit(fit_mixed, df[cols], t, features, groups, reml) for t in targets}
+        return {t: f.result() for t, f in futures.items()}
@@ -0,0 +1,111 @@
+import pandas as pd
+import loader
+
+
+STUDY_LAUNCH = pd.Timestamp('2024-11-21 00:00:00')
+ANSWER_PREFIXES = ['q_control', 'q_standard', 'q_cot', 'q_dd']
+FILTER_COLS = ['StartDate', 'Q3', 'Finished', 'condition', 'Q19_7', 'ui']
+ID_VARS = ['ResponseId', 'condition']
+
+### filters, applied in this order; each takes a chunk and returns a boolean mask of rows to keep
+def after_launch(df):
+    # Ignore test data, study launched at 21-11-2024
+    return df['StartDate'] > STUDY_LAUNCH
+
+def consented(df):
+    # consent provided, 1 = Yes
+    return df.Q3 == 1
+
+def finished(df):
+    return ~(df.Finished == 0)
+
+def has_condition(df):
+    return ~pd.isna(df.condition)
+
+def attention_check(df):
+    # for the control group, no attention check was displayed, hence the value is Nan
+    return pd.isna(df['Q19_7']) | (df['Q19_7'] == 5)
+
+FILTERS = {'launch': after_launch, 'consent': consented, 'finished': finished,
+           'condition': has_condition, 'attention check': attention_check}
+
+### reading
+def get_columns(fn):
+    if fn.endswith('.csv'):
+        return pd.read_csv(fn, nrows=0, encoding='utf-8-sig').columns
+    return loader.read_excel(fn, nrows=0).columns
+
+def get_answer_cols(columns):
+    return [col for prefix in ANSWER_PREFIXES for col in columns if col.startswith(prefix)]
+
+def iter_export(fn, chunksize=10000, usecols=None):
+    """Yield the Qualtrics export in row batches, restricted to `usecols`.
+
+    Csv exports are streamed from disk. Workbooks cannot be read in chunks, so they are loaded
+    once through the cache and sliced.
+    """
+    columns = get_columns(fn)
+    if usecols is None: usecols = list(columns)
+    # select by position, the export contains duplicate labels (Q1, Q3) which pandas suffixes
+    positions = sorted(columns.get_loc(c) for c in usecols)
+    if fn.endswith('.csv'):
+        dtypes = {c: object for c in get_answer_cols(usecols) + ['ui', 'ResponseId']}
+        dates = [c for c in loader.DATE_COLS if c in usecols]
+        yield from pd.read_csv(fn, skiprows=[1, 2], usecols=positions, chunksize=chunksize, dtype=dtypes,
+                               parse_dates=dates, encoding='utf-8-sig', low_memory=False)
+    else:
+        df = loader.read_excel(fn, skiprows=[1])
+        df = df.iloc[:, positions]
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+### pipeline
+def iter_filter_and_melt(fn, chunksize=10000, participant_cols=(), counts=None):
+    """Apply the inclusion filters batch by batch and yield (participants, long-form answers).
+
+    `participant_cols` are kept per included participant next to the filter columns; pass None to
+    keep the full export. Memory is bounded by the batch size and the set of seen `ui` values.
+    If `counts` is a dict, it is filled with the number of samples remaining after each filter.
+    """
+    columns = get_columns(fn)
+    answer_cols = get_answer_cols(columns)
+    if participant_cols is None: usecols = list(columns)
+    else: usecols = [c for c in columns if c in set(ID_VARS + FILTER_COLS + answer_cols + list(participant_cols))]
+    if counts is None: counts = {}
+    counts.setdefault('total', 0)
+    for name in list(FILTERS) + ['duplicates']: counts.setdefault(name, 0)
+
+    seen_ui = set()
+    for chunk in iter_export(fn, chunksize, usecols):
+        counts['total'] += len(chunk)
+        for name, keep in FILTERS.items():
+            chunk = chunk[keep(chunk)]
+            counts[name] += len(chunk)
+        # Exclude duplicates across batches; like Series.duplicated, a missing ui counts as a value
+        keys = chunk.ui.fillna('<NA>')
+        dup = keys.duplicated() | keys.isin(seen_ui)
+        seen_ui.update(keys)
+        chunk = chunk[~dup]
+        counts['duplicates'] += len(chunk)
+
+        df_long = pd.melt(chunk, id_vars=ID_VARS, value_vars=answer_cols,
+                          var_name='question', value_name='answer') \
+            .dropna(axis=0, subset='answer')
+        # preprocessing: strip and lower
+        df_long['answer'] = df_long.answer.str.strip().str.lower()
+        yield chunk, df_long
+
+def filter_and_melt(fn, chunksize=10000, participant_cols=None):
+    """Run the chunked pipeline and collect the filtered participants, the long form and the counts.
+
+    The long form is returned in the order pd.melt produces on the full export.
+    """
+    counts = {}
+    dfs, longs = [], []
+    for df, df_long in iter_filter_and_melt(fn, chunksize, participant_cols, counts):
+        dfs.append(df); longs.append(df_long)
+    df = pd.concat(dfs)
+    df_long = pd.concat(longs)
+    order = {c: i for i, c in enumerate(get_answer_cols(get_columns(fn)))}
+    df_long = df_long.sort_values('question', key=lambda s: s.map(order), kind='stable').reset_index(drop=True)
+    return df, df_long, pd.Series(counts, name='samples')
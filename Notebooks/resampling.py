@@ -0,0 +1,157 @@
+import os
+import concurrent.futures
+import numpy as np
+import pandas as pd
+
+
+### design matrices, built like utils.fit
+def get_design(df, target, features):
+    if not isinstance(features, list): features = [features]
+    X = pd.get_dummies(df[features], drop_first=True)
+    X.insert(0, 'const', 1.0)
+    return X.astype(float), df[target].astype(float)
+
+def dummies(codes, n_levels):
+    # one-hot encoding without the first level, as pd.get_dummies(drop_first=True)
+    return np.eye(n_levels)[codes][..., 1:]
+
+### batched least squares
+def batched_ols(X, Y):
+    """Solve a stack of least-squares problems, X of shape (B, n, p) or (n, p), Y of shape (B, n).
+
+    Uses one batched QR decomposition for the whole stack.
+    """
+    Q, R = np.linalg.qr(X)
+    QtY = np.einsum('...np,...n->...p', Q, Y)
+    with np.errstate(all='ignore'):
+        try:
+            return np.linalg.solve(R, QtY[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # a singular replicate makes the batched solve fail, fall back to the pseudo-inverse
+            return np.einsum('...pn,...n->...p', np.linalg.pinv(R), QtY)
+
+def _bootstrap_batch(X, y, clusters, n_clusters, n, seed):
+    # cluster bootstrap as weighted least squares: a cluster drawn k times gets weight k
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(n_clusters, np.full(n_clusters, 1 / n_clusters), size=n)
+    w = np.sqrt(counts[:, clusters])
+    return batched_ols(X[None] * w[..., None], y[None] * w)
+
+def _permutation_batch(X, y, clusters, cluster_codes, n_levels, columns, n, seed):
+    # permute the labels of the cluster-level feature across clusters and refit
+    rng = np.random.default_rng(seed)
+    perm = rng.permuted(np.tile(cluster_codes, (n, 1)), axis=1)
+    Xb = np.repeat(X[None], n, axis=0)
+    Xb[..., columns] = dummies(perm[:, clusters], n_levels)
+    return batched_ols(Xb, np.broadcast_to(y, (n, len(y))))
+
+def _run(func, args, n_resamples, batch_size, n_jobs, seed):
+    sizes = [min(batch_size, n_resamples - i) for i in range(0, n_resamples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if n_jobs == 1:
+        return np.concatenate([func(*args, n, s) for n, s in zip(sizes, seeds)])
+    with concurrent.futures.ProcessPoolExecutor(n_jobs) as pool:
+        futures = [pool.submit(func, *args, n, s) for n, s in zip(sizes, seeds)]
+        return np.concatenate([f.result() for f in futures])
+
+### results
+class ResamplingResults:
+    """Point estimates of the OLS fit with resampling-based s.e., CIs and p-values.
+
+    Mimics the attributes of statsmodels results used by get_tabular (params, bse, pvalues,
+    conf_int, aic, nobs). Permutation p-values are only reported for the `permuted` columns (the
+    dummies of the shuffled feature); the permutation distribution of the other coefficients does
+    not test their null, so their p-values are NaN.
+    """
+    def __init__(self, X, y, boot=None, perm=None, alternative='two-sided', permuted=None):
+        names = X.columns
+        beta = batched_ols(X.values, y.values)
+        self.params = pd.Series(beta, index=names)
+        resid = y.values - X.values @ beta
+        self.nobs = len(y)
+        self.llf = -self.nobs / 2 * (np.log(2 * np.pi) + np.log(resid @ resid / self.nobs) + 1)
+        self.aic = -2 * self.llf + 2 * X.shape[1]
+        self.boot = None if boot is None else pd.DataFrame(boot, columns=names)
+        self.perm = None if perm is None else pd.DataFrame(perm, columns=names)
+        self.permuted = list(names) if permuted is None else list(permuted)
+        self.bse = self.boot.std() if boot is not None else pd.Series(np.nan, index=names)
+        self.pvalues = self.get_pvalues(alternative) if perm is not None else pd.Series(np.nan, index=names)
+
+    def get_pvalues(self, alternative='two-sided'):
+        perm = self.perm.dropna()
+        if alternative == 'two-sided': extreme = perm.abs() >= self.params.abs()
+        elif alternative == 'less': extreme = perm <= self.params
+        elif alternative == 'greater': extreme = perm >= self.params
+        else: raise ValueError(f'Unknown alternative {alternative}')
+        p = (extreme.sum() + 1) / (len(perm) + 1)
+        return p.where(p.index.isin(self.permuted))
+
+    def get_boot_pvalues(self, alternative='two-sided'):
+        # test of beta = 0 against the bootstrap distribution centred at the estimate
+        boot = self.boot.dropna() - self.params
+        if alternative == 'two-sided': extreme = boot.abs() >= self.params.abs()
+        elif alternative == 'less': extreme = boot <= self.params
+        elif alternative == 'greater': extreme = boot >= self.params
+        else: raise ValueError(f'Unknown alternative {alternative}')
+        return (extreme.sum() + 1) / (len(boot) + 1)
+
+    def conf_int(self, alpha=0.05):
+        # percentile intervals of the cluster bootstrap
+        return self.boot.quantile([alpha / 2, 1 - alpha / 2]).T.set_axis([0, 1], axis=1)
+
+def resample_fit(df, target, features, cluster='ResponseId', permute='condition', n_resamples=10000,
+                 batch_size=500, n_jobs=None, seed=0, alternative='two-sided'):
+    """OLS of `target` on `features` with cluster-bootstrap and permutation inference.
+
+    Clusters (participants) are drawn with replacement for the bootstrap; for the permutation test,
+    the labels of `permute` are shuffled across clusters, which gives p-values for its dummies only
+    (see ResamplingResults.get_boot_pvalues for the other coefficients). Replicates are solved in batches of
+    `batch_size` and spread over `n_jobs` processes; results only depend on `seed`.
+    Pass cluster=None to resample rows, or permute=None to skip the permutation test.
+    """
+    if not isinstance(features, list): features = [features]
+    df = df.dropna(subset=features + [target])
+    X, y = get_design(df, target, features)
+    if n_jobs is None: n_jobs = os.cpu_count()
+    clusters, cluster_ids = pd.factorize(df[cluster] if cluster is not None else pd.RangeIndex(len(df)))
+
+    args = (X.values, y.values, clusters, len(cluster_ids))
+    boot = _run(_bootstrap_batch, args, n_resamples, batch_size, n_jobs, seed)
+
+    perm, columns = None, []
+    if permute is not None:
+        levels = pd.Categorical(df[permute])
+        codes = np.asarray(levels.codes)
+        first = np.unique(clusters, return_index=True)[1]
+        if (codes != codes[first][clusters]).any():
+            raise ValueError(f'{permute} is not constant within {cluster}')
+        columns = [X.columns.get_loc(f'{permute}_{c}') for c in levels.categories[1:]]
+        args = (X.values, y.values, clusters, codes[first], len(levels.categories), columns)
+        perm = _run(_permutation_batch, args, n_resamples, batch_size, n_jobs, seed + 1)
+    return ResamplingResults(X, y, boot, perm, alternative, X.columns[columns])
+
+### pairwise tests for annotate_tests
+def welch_t(a, b):
+    # Welch t statistic along the last axis
+    return (a.mean(-1) - b.mean(-1)) / np.sqrt(a.var(-1, ddof=1) / a.shape[-1] + b.var(-1, ddof=1) / b.shape[-1])
+
+def permutation_ttests(df, target, pairs, group='condition', n_resamples=10000, alternative='less', seed=0):
+    """Welch t statistics with permutation p-values for each pair of groups.
+
+    Returns {(group1, group2): (t, p)} as expected by annotate_tests; 'less' tests group1 < group2
+    like one_sided_ttest.
+    """
+    rng = np.random.default_rng(seed)
+    out = {}
+    for group1, group2 in pairs:
+        a = df.loc[df[group] == group1, target].dropna().values
+        b = df.loc[df[group] == group2, target].dropna().values
+        t = welch_t(a, b)
+        pooled = np.concatenate([a, b])
+        perm = rng.permuted(np.tile(pooled, (n_resamples, 1)), axis=1)
+        t_perm = welch_t(perm[:, :len(a)], perm[:, len(a):])
+        if alternative == 'less': extreme = t_perm <= t
+        elif alternative == 'greater': extreme = t_perm >= t
+        else: extreme = np.abs(t_perm) >= abs(t)
+        out[(group1, group2)] = (t, (extreme.sum() + 1) / (n_resamples + 1))
+    return out
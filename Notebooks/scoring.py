@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+### construct registry
+# items are scored on 1-7 Likert scales; scores are rescaled to 0-100.
+# missing: 'complete' gives NaN if any item is missing (as DataFrame.sum(skipna=False)),
+# 'prorate' scales up the mean of the answered items if at least `min_items` were answered.
+# Q21_1-Q21_3 (deceptive, suspicious, harmful) are worded negatively but were not reverse-coded
+# in the published trust scores; add them to 'reverse' for a reverse-coded variant.
+# 'alpha_reverse' items are reverse-coded for Cronbach's alpha only, the scores are unchanged.
+CONSTRUCTS = {
+    'cognitive-load': {'items': ['Q17_1', 'Q17_2', 'Q17_3', 'Q17_4', 'Q17_5'], 'min': 1, 'max': 7,
+                       'reverse': [], 'missing': 'complete'},
+    'usefulness': {'items': ['Q19_1', 'Q19_2', 'Q19_3', 'Q19_4', 'Q19_5', 'Q19_6'], 'min': 1, 'max': 7,
+                   'reverse': [], 'missing': 'complete'},
+    'ease-of-use': {'items': ['Q809_1', 'Q809_2', 'Q809_3', 'Q809_4', 'Q809_5', 'Q809_6'], 'min': 1, 'max': 7,
+                    'reverse': [], 'missing': 'complete'},
+    'trust': {'items': ['Q21_1', 'Q21_2', 'Q21_3', 'Q21_4', 'Q21_5', 'Q21_6'], 'min': 1, 'max': 7,
+              'reverse': [], 'alpha_reverse': ['Q21_1', 'Q21_2', 'Q21_3'], 'missing': 'complete'},
+}
+
+### scoring
+def get_items(df, constructs=CONSTRUCTS, reverse=('reverse',)):
+    # all items side by side, the items listed under the `reverse` keys flipped, and a membership
+    # matrix items x constructs
+    items = [i for c in constructs.values() for i in c['items']]
+    X = df[items].to_numpy(dtype=float)
+    member = np.zeros((len(items), len(constructs)))
+    col = 0
+    for j, c in enumerate(constructs.values()):
+        k = len(c['items'])
+        member[col:col + k, j] = 1
+        flip = np.isin(c['items'], [i for key in reverse for i in c.get(key, [])])
+        X[:, col:col + k][:, flip] = c['min'] + c['max'] - X[:, col:col + k][:, flip]
+        col += k
+    return X, member
+
+def cronbach_alpha(X):
+    # listwise complete rows
+    X = X[~np.isnan(X).any(axis=1)]
+    k = X.shape[1]
+    if k < 2 or len(X) < 2: return np.nan
+    return k / (k - 1) * (1 - X.var(axis=0, ddof=1).sum() / X.sum(axis=1).var(ddof=1))
+
+def score(df, constructs=CONSTRUCTS, index='ResponseId'):
+    """Score all constructs on a participant-level frame in one pass.
+
+    Returns the scores (one column per construct, indexed by `index`) and Cronbach's alpha per
+    construct, with the 'alpha_reverse' items also reverse-coded. Use broadcast to add the scores to a long-form frame.
+    """
+    X, member = get_items(df, constructs)
+    answered = ~np.isnan(X)
+    sums = np.where(answered, X, 0) @ member
+    counts = answered @ member
+    n_items = member.sum(axis=0)
+    lo = np.array([c['min'] for c in constructs.values()]) * n_items
+    hi = np.array([c['max'] for c in constructs.values()]) * n_items
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # prorated sums equal the plain sums for complete rows
+        sums = sums * n_items / counts
+    min_items = np.array([c.get('min_items', 1) if c['missing'] == 'prorate' else len(c['items'])
+                          for c in constructs.values()])
+    sums[counts < min_items] = np.nan
+    scores = pd.DataFrame((sums - lo) / (hi - lo) * 100, columns=list(constructs),
+                          index=df[index] if index is not None else df.index)
+
+    X, _ = get_items(df, constructs, ('reverse', 'alpha_reverse'))
+    col = np.concatenate([[0], np.cumsum(n_items.astype(int))])
+    alpha = pd.Series([cronbach_alpha(X[:, a:b]) for a, b in zip(col[:-1], col[1:])],
+                      index=list(constructs), name='alpha')
+    return scores, alpha
+
+def broadcast(df_long, scores, on='ResponseId', columns=None):
+    """Join (a subset of) the participant-level scores to a long-form frame, replacing earlier scores."""
+    if columns is not None: scores = scores[columns]
+    return df_long.drop(columns=scores.columns, errors='ignore').join(scores, on=on)
@@ -0,0 +1,138 @@
+import os
+import json
+import shutil
+import pickle
+import numpy as np
+import pandas as pd
+
+
+STORE = '../Data/data_evaluated'
+KEY = 'ResponseId'
+# always kept in the fact table; other columns that vary within a participant are added
+FACT_COLS = ['question', 'condition', 'answer', 'judgement']
+
+### writing
+def split(df, key=KEY, fact_cols=FACT_COLS):
+    """Split the long form into a narrow fact table and a participant table with one row per `key`."""
+    varying = df.groupby(key, sort=False).nunique(dropna=False).max() > 1
+    fact_cols = list(dict.fromkeys([c for c in fact_cols if c in df] + list(varying.index[varying])))
+    participants = df.drop(columns=fact_cols).drop_duplicates(key).set_index(key)
+    return df[[key] + fact_cols], participants
+
+def encode(s):
+    """Values of a column as a numpy array, with its categories or NA mask.
+
+    Numpy numeric and datetime columns are stored as they are. Nullable extension columns (Int64,
+    boolean, Float64) are stored as their values and a mask of the NAs; tz-aware datetimes as UTC
+    integers with the time zone in the dtype. Everything else is stored as categorical codes.
+    """
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in 'biufcmM': return s.to_numpy(), None
+    if isinstance(s.dtype, pd.DatetimeTZDtype):
+        return s.array.asi8, {'dtype': str(s.dtype), 'mask': s.isna().to_numpy()}
+    if isinstance(s.array, pd.arrays.BooleanArray | pd.arrays.IntegerArray | pd.arrays.FloatingArray):
+        return s.array._data, {'dtype': str(s.dtype), 'mask': s.array._mask}
+    cat = s.astype('category') if not isinstance(s.dtype, pd.CategoricalDtype) else s
+    codes = cat.cat.codes.to_numpy()
+    return codes, {'categories': list(cat.cat.categories)}
+
+def decode(values, info):
+    if 'categories' in info: return pd.Categorical.from_codes(values, info['categories'])
+    dtype = pd.api.types.pandas_dtype(info['dtype'])
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        utc = pd.DatetimeIndex(values.view(f'datetime64[{dtype.unit}]')).tz_localize('UTC')
+        return utc.tz_convert(dtype.tz).where(~info['mask'])
+    return dtype.construct_array_type()(values, info['mask'])
+
+def write_table(df, path):
+    os.makedirs(path)
+    columns, categories, dtypes = [], {}, {}
+    for i, (name, s) in enumerate(df.items()):
+        values, info = encode(s)
+        np.save(os.path.join(path, f'{i}.npy'), values)
+        columns.append(name)
+        if info is None: continue
+        if 'categories' in info: categories[name] = info['categories']
+        else:
+            np.save(os.path.join(path, f'{i}.mask.npy'), info['mask'])
+            dtypes[name] = info['dtype']
+    with open(os.path.join(path, 'categories.pkl'), 'wb') as f:
+        pickle.dump(categories, f)
+    return {'columns': columns, 'nrows': len(df), 'dtypes': dtypes}
+
+def save(df, path=STORE, key=KEY, fact_cols=FACT_COLS):
+    """Write df_eval as a columnar store: one .npy file per column of the fact and participant tables.
+
+    In the fact table, `key` is stored as the row position in the participant table.
+    """
+    facts, participants = split(df, key, fact_cols)
+    facts = facts.assign(**{key: participants.index.get_indexer(facts[key]).astype(np.int32)})
+    tmp = path + '.tmp'
+    if os.path.exists(tmp): shutil.rmtree(tmp)
+    meta = {'key': key,
+            'facts': write_table(facts, os.path.join(tmp, 'facts')),
+            'participants': write_table(participants.reset_index(), os.path.join(tmp, 'participants'))}
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+    if os.path.exists(path): shutil.rmtree(path)
+    os.replace(tmp, path)
+
+### reading
+class Table:
+    """Lazily read columns of a stored table; with mmap, the arrays stay on disk until used."""
+    def __init__(self, path, meta, mmap=True):
+        self.path, self.mmap = path, mmap
+        self.columns = meta['columns']
+        self.nrows = meta['nrows']
+        self.dtypes = meta.get('dtypes', {})
+        with open(os.path.join(path, 'categories.pkl'), 'rb') as f:
+            self.categories = pickle.load(f)
+
+    def array(self, name, suffix='npy'):
+        fn = os.path.join(self.path, f'{self.columns.index(name)}.{suffix}')
+        return np.load(fn, mmap_mode='r' if self.mmap else None)
+
+    def column(self, name, take=None):
+        values = self.array(name)
+        if take is not None: values = values[take]
+        values = np.asarray(values)
+        if name in self.categories: return decode(values, {'categories': self.categories[name]})
+        if name in self.dtypes:
+            mask = self.array(name, 'mask.npy')
+            if take is not None: mask = mask[take]
+            return decode(values, {'dtype': self.dtypes[name], 'mask': np.asarray(mask)})
+        return values
+
+    def read(self, columns=None, take=None):
+        if columns is None: columns = self.columns
+        return pd.DataFrame({c: self.column(c, take) for c in columns})
+
+class Store:
+    def __init__(self, path=STORE, mmap=True):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.key = meta['key']
+        self.facts = Table(os.path.join(path, 'facts'), meta['facts'], mmap)
+        self.participants = Table(os.path.join(path, 'participants'), meta['participants'], mmap)
+
+    @property
+    def columns(self):
+        return self.facts.columns + [c for c in self.participants.columns if c != self.key]
+
+    def load(self, columns=None, categorical=True):
+        """The fact table joined with the participant columns in `columns` (default: all).
+
+        Participant columns are gathered by the stored row positions, so only the requested ones are
+        read. With categorical=False, categorical columns are returned as plain values.
+        """
+        if columns is None: columns = self.participants.columns
+        rows = np.asarray(self.facts.array(self.key))
+        facts = {c: self.facts.column(c) for c in self.facts.columns if c != self.key}
+        columns = [self.key] + [c for c in columns if c not in facts and c != self.key]
+        df = pd.DataFrame({**{c: self.participants.column(c, rows) for c in columns[:1]}, **facts,
+                           **{c: self.participants.column(c, rows) for c in columns[1:]}})
+        if not categorical:
+            df = df.apply(lambda s: s.astype(s.cat.categories.dtype) if s.dtype == 'category' else s)
+        return df
+
+def load(path=STORE, columns=None, mmap=True, categorical=True):
+    return Store(path, mmap).load(columns, categorical)
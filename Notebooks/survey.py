@@ -0,0 +1,155 @@
+import re
+import json
+import numpy as np
+import pandas as pd
+import loader
+
+
+QSF = '../Survey/LLMs_in_Medicine.qsf'
+# main task blocks -> condition, named as in the export columns (q_control1, t_dd20, ...)
+MAIN_TASK_BLOCKS = {
+    'Main Task without AI': 'control',
+    'Main Task with AI - Standard Prompting': 'standard',
+    'Main Task with AI - CoT Prompting': 'cot',
+    'Main Task with AI - Differential Diagnosis Prompting': 'dd',
+}
+ITEM_TYPES = {'TE': 'text', 'Timing': 'timer', 'MC': 'choice', 'Matrix': 'matrix', 'DB': 'display', 'Slider': 'slider'}
+TIMER_METRICS = {'FIRST_CLICK': 'First Click', 'LAST_CLICK': 'Last Click', 'PAGE_SUBMIT': 'Page Submit',
+                 'CLICK_COUNT': 'Click Count'}
+# answer columns of the main task, renamed in the survey so they keep their name across versions
+ANSWERS = 'q_{condition}{case}'
+# page times in ms recorded by the survey's javascript as embedded data, one per case and condition
+PAGE_TIMES = 't_{condition}{case}'
+CATEGORICAL = ['block', 'condition', 'item', 'metric', 'question', 'timer']
+
+### survey definition
+def parse_qsf(fn=QSF):
+    """One row per question of the survey definition (qid, export tag, block, page, item type).
+
+    For the main task, the case is the page within the block and the timer is the Timing question
+    shown on the same page.
+    """
+    with open(fn, encoding='utf-8') as f:
+        elements = json.load(f)['SurveyElements']
+    questions = {e['PrimaryAttribute']: e['Payload'] for e in elements if e['Element'] == 'SQ'}
+    blocks = next(e['Payload'] for e in elements if e['Element'] == 'BL')
+    if isinstance(blocks, dict): blocks = blocks.values()
+
+    rows = []
+    for block in blocks:
+        if block.get('Type') == 'Trash': continue
+        condition = MAIN_TASK_BLOCKS.get(block['Description'])
+        page = 1
+        for element in block.get('BlockElements', []):
+            if element['Type'] == 'Page Break':
+                page += 1
+                continue
+            q = questions.get(element.get('QuestionID'))
+            if q is None: continue
+            rows.append({'qid': q['QuestionID'], 'tag': q['DataExportTag'], 'block': block['Description'],
+                         'page': page, 'condition': condition, 'case': page if condition else np.nan,
+                         'item': ITEM_TYPES.get(q['QuestionType'], q['QuestionType'])})
+    qsf = pd.DataFrame(rows)
+    timers = qsf[qsf.item == 'timer'].drop_duplicates(['block', 'page']).set_index(['block', 'page']).qid
+    qsf['timer'] = timers.reindex(pd.MultiIndex.from_frame(qsf[['block', 'page']])).values
+    qsf['case'] = qsf.case.astype('Int8')
+    return qsf
+
+def read_qsf(fn=QSF):
+    # parsed once per survey version, keyed on the content of the .qsf
+    return loader.read_cached(fn, parse_qsf)
+
+### export columns
+def get_import_ids(fn):
+    # the csv export carries {"ImportId": ...} as third header row; workbooks do not
+    if not fn.endswith('.csv'): return None
+    header = pd.read_csv(fn, nrows=3, header=None, encoding='utf-8-sig')
+    columns = pd.read_csv(fn, nrows=0, encoding='utf-8-sig').columns
+    return pd.Series([json.loads(v)['ImportId'] for v in header.iloc[2]], index=columns)
+
+def split_ids(ids, pattern):
+    parts = ids.str.extract(pattern)
+    return parts[0], parts[1]
+
+def build_index(columns, import_ids=None, qsf=None):
+    """Map each export column to (qid, block, condition, case, item, metric, timer, question).
+
+    Columns are linked to the survey definition by their import id (QID429_TEXT -> QID429), or by
+    the export tag when the export has no import ids. Answer and page time columns of the main task
+    are also recognized by their names (q_dd20, t_dd20), as the export tags in the .qsf may be
+    older than the column names. Columns that are not survey questions (metadata, embedded data)
+    get missing values.
+    """
+    if qsf is None: qsf = read_qsf()
+    index = pd.DataFrame(index=pd.Index(columns, name='column'))
+    if import_ids is not None:
+        qid, suffix = split_ids(import_ids.reindex(index.index), r'^(QID\d+)(?:_(.+))?$')
+        index['qid'] = qid.values
+    else:
+        # export tags are not unique across survey versions: timer columns (Q797_First Click) are
+        # matched among the timers only, other ambiguous tags are not mapped
+        pattern = '^({})(?:_(.+))?$'.format('|'.join(map(re.escape, sorted(qsf.tag.unique(), key=len, reverse=True))))
+        tag, suffix = split_ids(pd.Series(index.index, index=index.index), pattern)
+        is_timer = suffix.str.upper().str.replace(' ', '_').isin(list(TIMER_METRICS))
+        timers = qsf[qsf.item == 'timer'].drop_duplicates('tag', keep=False).set_index('tag').qid
+        tags = qsf.drop_duplicates('tag', keep=False).set_index('tag').qid
+        index['qid'] = tag.map(tags).where(~is_timer, tag.map(timers)).values
+    suffix = suffix.values
+
+    # answer columns by name, for exports whose columns are not linked to the .qsf otherwise
+    cases = qsf[qsf.condition.notna() & (qsf.item == 'text')]
+    answers = {ANSWERS.format(condition=row.condition, case=row.case): row.qid for row in cases.itertuples()}
+    index['qid'] = index.qid.fillna(pd.Series(index.index.map(answers), index=index.index))
+    index = index.join(qsf.drop(columns='tag').drop_duplicates('qid').set_index('qid'), on='qid')
+    timer = (index.item == 'timer').values
+    metric = pd.Series(suffix).str.upper().str.replace(' ', '_').map(TIMER_METRICS)
+    index['metric'] = np.where(timer, metric, None)
+
+    # javascript page times of the main task
+    fields = ['block', 'page', 'condition', 'case', 'timer']
+    page_times = {PAGE_TIMES.format(condition=row.condition, case=row.case): row
+                  for row in cases[fields].itertuples(index=False)}
+    is_time = index.index.isin(list(page_times))
+    if is_time.any():
+        values = pd.DataFrame([page_times[c] for c in index.index[is_time]], columns=fields,
+                              index=index.index[is_time])
+        for col in values: index.loc[is_time, col] = values[col]
+        index.loc[is_time, 'item'] = 'page time'
+        index.loc[is_time, 'metric'] = 'Page Time'
+
+    index['page'] = index.page.astype('Int16')
+    index['case'] = index.case.astype('Int8')
+    index['question'] = ('question_' + index.case.astype(str)).where(index.case.notna())
+    for col in CATEGORICAL: index[col] = index[col].astype('category')
+    return index
+
+def get_index(export=None, qsf=QSF):
+    """Index of the export's columns against the survey definition, see build_index.
+
+    By default, the export chosen by loader.get_export is indexed.
+    """
+    from preprocessing import get_columns
+    if export is None: export = loader.get_export()
+    return build_index(get_columns(export), get_import_ids(export), read_qsf(qsf))
+
+### lookups
+def lookup(columns, index, field='question'):
+    """Vectorized mapping of a column of export column names (e.g. the melted `question`) to `field`.
+
+    Each distinct name is looked up once, the values are gathered by the factorized codes.
+    """
+    codes, uniques = pd.factorize(columns)
+    values = index[field].reindex(uniques)
+    missing = values.isna()
+    if missing.any():
+        raise KeyError(f'No {field} in the survey definition for {list(uniques[missing.values])}; '
+                       f'export the responses as csv with import ids to link them to the .qsf')
+    return pd.Series(np.asarray(values, dtype=object)[codes], index=getattr(columns, 'index', None),
+                     name=getattr(columns, 'name', field))
+
+def select(index, **conditions):
+    """Columns of the index matching all `conditions`, e.g. select(index, item='timer', condition='dd')."""
+    mask = np.ones(len(index), dtype=bool)
+    for k, v in conditions.items():
+        mask &= index[k].isin(v if isinstance(v, (list, tuple, set)) else [v]).values
+    return index[mask]
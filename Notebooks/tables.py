@@ -0,0 +1,176 @@
+import os
+import re
+import warnings
+import numbers
+import build
+
+
+TEX_DIR = '../Results/Tex'
+SUPPLEMENT = 'supplementary_materials.tex'
+# a minus sign of a number: not part of a word, a number (1e-05) or a range (1-2)
+MINUS = re.compile(r'(?<![\w.])-(?=\d)')
+PERCENT = re.compile(r'(?<!\\)%')
+
+### cell formatting
+class Formatter:
+    """Formats the cells of a table in one pass, with the number formats compiled once."""
+    def __init__(self, n_dc=3, replacements={}):
+        self.number = f'{{:.{n_dc}f}}'.format
+        self.replacements = list(replacements.items())
+
+    def float(self, x):
+        s = self.number(x) if x == x else 'NaN'
+        return '$-$' + s[1:] if s.startswith('-') else s
+
+    def text(self, s):
+        return PERCENT.sub(r'\%', MINUS.sub('$-$', s))
+
+    def label(self, s):
+        for k, v in self.replacements: s = s.replace(k, v)
+        return PERCENT.sub(r'\%', s)
+
+    def cell(self, x):
+        if isinstance(x, str): return self.text(x)
+        if isinstance(x, numbers.Real) and not isinstance(x, numbers.Integral): return self.float(x)
+        return self.text(str(x))
+
+    def row(self, cells):
+        return ' & '.join(cells) + ' \\\\\n'
+
+def default_index_formatter(o):
+    return '\\textit{' + o.replace('_', ': ').title() + '}'
+
+### tables
+def model_rows(model, fmt, const_name='Intercept', index_formatter=default_index_formatter):
+    # rows of get_tabular(model=...) straight from the results, without an intermediate frame
+    ci = model.conf_int()
+    values = zip(model.params.index, model.params.tolist(), model.bse.tolist(), list(model.pvalues),
+                 ci[0].tolist(), ci[1].tolist())
+    for name, coef, se, p, lo, hi in values:
+        name = index_formatter(const_name if name == 'const' else name)
+        yield [fmt.label(name), fmt.float(coef), fmt.float(se), fmt.float(p) if not p < 0.0005 else '$< 0.001$',
+               f'[{fmt.float(lo)}; {fmt.float(hi)}]']
+
+def frame_rows(df, fmt, const_name='Intercept', index_formatter=default_index_formatter):
+    for name, values in zip(df.index, df.itertuples(index=False)):
+        name = index_formatter(const_name if name == 'const' else name)
+        yield [fmt.label(name)] + [fmt.cell(v) for v in values]
+
+def info_rows(model, add_info, fmt):
+    for k, v in add_info.items():
+        o = v
+        if isinstance(v, str):
+            try:
+                o = model
+                for attr in v.split('.'): o = getattr(o, attr)
+            except AttributeError: o = v
+        value = str(int(o)) if k == 'Obs. ($N$)' else fmt.float(float(o))
+        yield f'{fmt.label(k)} & & & & {value} \\\\ \n'
+
+def tabular(model=None, summary_df=None, const_name='Intercept', replacements={'Ai': 'AI', 'It': 'IT'},
+            index_formatter=None, n_dc=3, column_format='lrrrr', add_info={'AIC': 'aic', 'Obs. ($N$)': 'nobs'}):
+    """The tabular of utils.get_tabular, rendered in a single pass over the results.
+
+    Labels (index, header, info rows) get the `replacements`; numbers are formatted directly with a
+    LaTeX minus, so text is never rewritten by a pattern over the whole table.
+    """
+    if index_formatter is None: index_formatter = default_index_formatter
+    fmt = Formatter(n_dc, replacements)
+    if summary_df is None and model is not None:
+        header = ['Coef.', 's.e.', '$P$-value', '95 % CI']
+        rows = model_rows(model, fmt, const_name, index_formatter)
+    elif summary_df is not None and model is None:
+        header = [str(c) for c in summary_df.columns]
+        rows = frame_rows(summary_df, fmt, const_name, index_formatter)
+    else: raise ValueError(f"Supply either model or summary_df!")
+
+    parts = [f'\\begin{{tabular}}{{{column_format}}}\n\\toprule\n', fmt.row([''] + [fmt.label(h) for h in header])]
+    if summary_df is not None and summary_df.index.name is not None:
+        parts.append(fmt.row([fmt.label(str(summary_df.index.name))] + [''] * len(header)))
+    parts.append('\\midrule\n')
+    parts.extend(fmt.row(r) for r in rows)
+    parts.append('\\midrule\n\n')
+    if isinstance(add_info, dict): parts.extend(info_rows(model, add_info, fmt))
+    parts.append('\\bottomrule\n\\end{tabular}')
+    return ''.join(parts)
+
+def table(tab, fn, caption_text=None, label_text=None, center=True, rowwidth=1, footnotesize=True):
+    """The table environment of utils.to_table around a tabular."""
+    caption_text = caption_text if caption_text is not None else fn
+    caption_text = MINUS.sub('$-$', caption_text).replace('P-', '$P$-')
+    if footnotesize: caption_text = '\\footnotesize ' + caption_text
+    label_text = label_text if label_text is not None else 'tab:' + fn.replace(' ', '-')
+    return ''.join([
+        '\\begin{table}\n', '\\begin{center}\n' if center else '',
+        '\\begingroup\n\\footnotesize\n' if footnotesize else '',
+        f'\\renewcommand{{\\arraystretch}}{{{rowwidth}}}\n' if rowwidth is not None else '',
+        tab if not isinstance(tab, list) else ''.join(tab),
+        '\\endgroup\n' if footnotesize else '',
+        f'\\caption{{{caption_text}}}', f'\n\\label{{{label_text}}}',
+        '\n\\end{center}' if center else '', '\n\\end{table}'])
+
+def tabtex(o, cap='Caption', lab='tab:my_label', escape=True, n_dec=3, footnotesize=True, rowwidth=1):
+    """The table of utils.save_tabtex around DataFrame.to_latex, built as one string."""
+    return ''.join([
+        '\\begin{table}\n\\centering\n', '\\begingroup\n\\footnotesize\n' if footnotesize else '',
+        f'\\renewcommand{{\\arraystretch}}{{{rowwidth}}}\n' if rowwidth is not None else '',
+        o.to_latex(escape=escape, float_format=f'%.{n_dec}f'),
+        '\\endgroup\n' if footnotesize else '',
+        f'\\caption{{\\footnotesize {cap}}}\n' if footnotesize else f'\\caption{{{cap}}}\n',
+        f'\\label{{{lab}}}\n', '\\end{table}'])
+
+### streaming into the supplement
+class Supplement:
+    """Writes each table to <TEX_DIR>/<fn>.tex and keeps it for the supplement, without reading it back.
+
+    Use as a context manager. On exit, the tables are recorded in the build manifest and the
+    supplement is assembled in the manifest order, so tables saved with save_tex or save_tabtex
+    earlier stay in it (their .tex files are read); the result equals consolidate_tex. Without a
+    manifest (or with build.RECORD off), the supplement holds the streamed tables in their order.
+    """
+    def __init__(self, tex_dir=TEX_DIR, fn=SUPPLEMENT, add_header=False):
+        self.tex_dir, self.fn, self.add_header = tex_dir, fn, add_header
+        self.ok = False
+        self.texs = {}
+        self.recorded = []
+
+    def __enter__(self):
+        self.ok = os.path.isdir(self.tex_dir)
+        if not self.ok: warnings.warn(f'Create "{self.tex_dir}" folder to save tex files')
+        return self
+
+    def __exit__(self, *exc):
+        if not self.ok: return
+        build.record_many(self.recorded, 'tex')
+        order = (build.supplement_order() if build.RECORD else []) or list(self.texs)
+        with open(os.path.join(self.tex_dir, self.fn), 'w') as f:
+            for fn in order:
+                if fn == os.path.splitext(self.fn)[0]: continue
+                tex = self.texs.get(fn)
+                if tex is None:
+                    try:
+                        with open(os.path.join(self.tex_dir, f'{fn}.tex')) as t: tex = PERCENT.sub(r'\%', t.read())
+                    except FileNotFoundError:
+                        warnings.warn(f'{fn}.tex is in the manifest but not in "{self.tex_dir}"')
+                        continue
+                if self.add_header:
+                    f.write(f'\\section*{{{fn}}}\n\\label{{sec:{fn.replace(" ", "_")}.tex}}\n')
+                f.write(tex + '\n\n')
+
+    def add(self, fn, tex, record=True):
+        if not self.ok: return
+        with open(os.path.join(self.tex_dir, f'{fn}.tex'), 'w') as f:
+            f.write(tex)
+        if record: self.recorded.append(fn)
+        self.texs[fn] = PERCENT.sub(r'\%', tex)
+
+    def add_model(self, fn, model=None, summary_df=None, caption=None, label=None, center=True, rowwidth=1,
+                  footnotesize=True, record=True, **kwargs):
+        # as utils.save_tex
+        self.add(fn, table(tabular(model, summary_df, **kwargs), fn, caption, label, center, rowwidth, footnotesize),
+                 record)
+
+    def add_frame(self, o, fn, cap='Caption', lab='tab:my_label', escape=True, n_dec=3, footnotesize=True,
+                  rowwidth=1, record=True):
+        # as utils.save_tabtex
+        self.add(fn, tabtex(o, cap, lab, escape, n_dec, footnotesize, rowwidth), record)
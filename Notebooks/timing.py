@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import loader
+import preprocessing
+import survey
+
+
+# Qualtrics page timers in seconds, the click count, and the javascript page time (ms, 0 if not shown)
+METRICS = ['First Click', 'Last Click', 'Page Submit', 'Click Count', 'Page Time']
+TIME_METRICS = ['First Click', 'Last Click', 'Page Submit', 'Page Time']
+# condition codes of the export, in the naming of survey.MAIN_TASK_BLOCKS
+CONDITION_CODES = {'control': 1, 'standard': 2, 'cot': 3, 'dd': 4}
+
+class Timing:
+    """Response times as a float32 array of participants x cases x metrics.
+
+    Each participant only saw the cases of their condition, so the timer columns of the four
+    conditions collapse into one case axis.
+    """
+    def __init__(self, values, ids, cases, metrics=METRICS):
+        self.values = values
+        self.ids = pd.Index(ids, name='ResponseId')
+        self.cases = np.asarray(cases)
+        self.metrics = list(metrics)
+
+    def __getitem__(self, metric):
+        return self.values[..., self.metrics.index(metric)]
+
+    def to_frame(self, metrics=None):
+        # long form, one row per participant and case
+        if metrics is None: metrics = self.metrics
+        idx = pd.MultiIndex.from_product([self.ids, [f'question_{c}' for c in self.cases]],
+                                         names=['ResponseId', 'question'])
+        return pd.DataFrame({m: self[m].ravel() for m in metrics}, index=idx)
+
+    def apply(self, func, metrics=TIME_METRICS):
+        # a new Timing with `func` applied to the (participants x cases) array of each metric
+        values = self.values.copy()
+        for m in metrics:
+            if m in self.metrics: values[..., self.metrics.index(m)] = func(self[m])
+        return Timing(values, self.ids, self.cases, self.metrics)
+
+### extraction
+def get_layout(index):
+    # column positions per (condition code, case, metric) of the main task timers, -1 if missing
+    timers = survey.select(index, item=['timer', 'page time'], condition=list(CONDITION_CODES))
+    cases = np.sort(timers.case.unique().astype(int))
+    layout = np.full((max(CONDITION_CODES.values()) + 1, len(cases), len(METRICS)), -1)
+    conditions = timers.condition.map(CONDITION_CODES).astype(int).values
+    case_pos = np.searchsorted(cases, timers.case.astype(int).values)
+    metric_pos = timers.metric.map({m: i for i, m in enumerate(METRICS)}).astype(int).values
+    layout[conditions, case_pos, metric_pos] = np.arange(len(timers))
+    return list(timers.index), cases, layout
+
+def extract(fn=None, ids=None, index=None, chunksize=10000):
+    """Read the main task timers of `fn` into a Timing, streaming only the timer columns.
+
+    By default, the export chosen by loader.get_export is read. `ids` restricts the result to these participants (e.g. the filtered df.ResponseId), in that order.
+    """
+    if fn is None: fn = loader.get_export()
+    if index is None: index = survey.get_index(fn)
+    columns, cases, layout = get_layout(index)
+    chunks = []
+    for chunk in preprocessing.iter_export(fn, chunksize, ['ResponseId', 'condition'] + columns):
+        if ids is not None: chunk = chunk[chunk.ResponseId.isin(ids)]
+        chunk = chunk[chunk.condition.isin(list(CONDITION_CODES.values()))]
+        # append a missing column for timers that are not part of the export
+        values = np.column_stack([chunk[columns].to_numpy(dtype=np.float32),
+                                  np.full(len(chunk), np.nan, dtype=np.float32)])
+        rows = np.arange(len(chunk))[:, None, None]
+        chunks.append((chunk.ResponseId.values, values[rows, layout[chunk.condition.astype(int).values]]))
+    found = np.concatenate([c[0] for c in chunks])
+    values = np.concatenate([c[1] for c in chunks])
+    if ids is not None:
+        pos = pd.Index(found).get_indexer(ids)
+        values = np.where((pos >= 0)[:, None, None], values[pos], np.nan)
+        found = np.asarray(ids)
+
+    # javascript page times are in ms and 0 for pages that were not shown
+    t = METRICS.index('Page Time')
+    values[..., t] = np.where(values[..., t] > 0, values[..., t] / 1000, np.nan)
+    return Timing(values, found, cases)
+
+### transforms, applied per case across participants
+def log(x):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(np.where(x > 0, x, np.nan))
+
+def trim_mad(x, k=3):
+    # drop times more than k scaled MADs from the case median
+    med = np.nanmedian(x, axis=0)
+    mad = 1.4826 * np.nanmedian(np.abs(x - med), axis=0)
+    return np.where(np.abs(x - med) <= k * mad, x, np.nan)
+
+def trim_quantile(x, lower=0.01, upper=0.99):
+    lo, hi = np.nanquantile(x, [lower, upper], axis=0)
+    return np.where((x >= lo) & (x <= hi), x, np.nan)
+
+### joining
+def join(df, timing, metrics=['Page Submit'], names=None):
+    """Add `metrics` of `timing` to the long-form df by ResponseId and question, without a merge."""
+    if names is None: names = metrics
+    participants = timing.ids.get_indexer(df.ResponseId)
+    case_codes = pd.Index([f'question_{c}' for c in timing.cases]).get_indexer(df.question)
+    valid = (participants >= 0) & (case_codes >= 0)
+    df = df.copy()
+    for m, name in zip(metrics, names):
+        values = timing[m][participants, case_codes]
+        df[name] = np.where(valid, values, np.nan)
+    return df
@@ -0,0 +1,46 @@
+"""Analysis and visualization utilities.
+
+Submodules are imported on first access of one of their names, so that e.g.
+`from utils import map_condition, GROUND_TRUTHS` does not pull in statsmodels or matplotlib.
+`from utils import *` still provides everything, including the module aliases (pd, sm, plt, ...)
+that the notebooks rely on.
+"""
+import importlib
+
+
+_SUBMODULES = {
+    'mapping': ['round', 'map_condition', 'map_condition_label'],
+    'cases': ['TASKS', 'GROUND_TRUTHS', 'PROMPT', 'DIAGNOSES_GPT', 'DD_GPT'],
+    'plotting': ['bar_annotate_n', 'format_ylab', 'format_xlab', 'capitalize_xticklabels', 'wrap_xticklabels',
+                 'format_percentage', 'format_labs', 'add_grid', 'save_plot', 'annotate_tests'],
+    'inference': ['one_sided_ttest', 'fit'],
+    'data': ['prepare_adh_df', 'get_gpt_review_df'],
+    'latex': ['order_of_supplements', 'get_tabular', 'to_table', 'save_tex', 'save_tabtex', 'escape_percent',
+              'latex_minus_and_p', 'consolidate_tex'],
+}
+_NAMES = {name: module for module, names in _SUBMODULES.items() for name in names}
+
+# modules that used to be imported at the top of utils.py
+_MODULES = {
+    'os': 'os', 're': 're', 'warnings': 'warnings', 'textwrap': 'textwrap',
+    'pd': 'pandas', 'sm': 'statsmodels.api', 'stats': 'scipy.stats', 'sns': 'seaborn',
+    'plt': 'matplotlib.pyplot', 'mtick': 'matplotlib.ticker',
+    'loader': 'loader', 'adherence': 'adherence', 'build': 'build',
+}
+
+__all__ = list(_NAMES) + list(_MODULES) + ['MixedLMResultsWrapper']
+
+def __getattr__(name):
+    if name in _NAMES:
+        value = getattr(importlib.import_module(f'.{_NAMES[name]}', __name__), name)
+    elif name in _MODULES:
+        value = importlib.import_module(_MODULES[name])
+    elif name == 'MixedLMResultsWrapper':
+        from statsmodels.regression.mixed_linear_model import MixedLMResultsWrapper as value
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
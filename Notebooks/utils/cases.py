@@ -1,316 +1,3 @@
-import os
-import statsmodels.api as sm
-import seaborn as sns
-import matplotlib.pyplot as plt 
-import scipy.stats as stats
-import pandas as pd
-from statsmodels.regression.mixed_linear_model import MixedLMResultsWrapper
-import textwrap
-import matplotlib.ticker as mtick
-import re
-import warnings
-
-
-order_of_supplements = []
-
-def round(num, ndec):
-    import math
-    multiplier = 10 ** ndec
-    return math.floor(num * multiplier + 0.5) / multiplier
-
-
-### mapping functions
-def map_condition(i):
-  if i == 1: return 'control'
-  elif i == 2: return 'standard'
-  elif i == 3: return 'chain-of-thought'
-  elif i == 4: return 'differential'
-  else: raise ValueError
- 
-def map_condition_label(label):
-    label = label.strip()
-    if label == 'Differential' or label == 'differential':
-        return 'Differential diagnosis'
-    return label
- 
-### plotting functions
-def bar_annotate_n(sample_sizes,y=10,ax=None):
-    if ax is None: ax = plt.gca()
-    for bar, n in zip(ax.patches, sample_sizes):
-        x = bar.get_x() + bar.get_width() / 2
-        ax.text(x, y, f'$n={n}$', ha='center', va='bottom', fontsize=10, fontdict={'color': 'white'})
-    
-def format_ylab(ylab=None,ax=None): 
-    if ax is None: ax = plt.gca()   
-    if ylab is None: 
-        l = ax.get_ylabel().replace('-',' ').capitalize()
-        ax.set_ylabel(l)
-    else: ax.set_ylabel(ylab)
-    
-def format_xlab(xlab=None,ax=None):
-    if ax is None: ax = plt.gca()
-    if xlab is None: 
-        l = ' '.join(word.capitalize() for word in ax.get_xlabel().split())
-        ax.set_xlabel(l)
-    else: ax.set_xlabel(xlab)
-    
-def capitalize_xticklabels(ax=None): 
-    if ax is None: ax = plt.gca()
-    ax.set_xticklabels([_.get_text().capitalize() for _ in ax.get_xticklabels()])
-def wrap_xticklabels(labelwrap,ax=None):
-    if ax is None: ax = plt.gca()
-    labels = [textwrap.fill(map_condition_label(tick.get_text()), width=labelwrap) for tick in plt.gca().get_xticklabels()]
-    ax.set_xticklabels(labels, rotation=0)
-
-def format_percentage(perc,ax=None): 
-    if ax is None: ax = plt.gca()
-    ax.yaxis.set_major_formatter(mtick.PercentFormatter(xmax=perc))
-
-def format_labs(ylab=None,xlab=None,ylim=(0,100),capitalize=True,perc=100,labelwrap=12,ax=None):
-    # careful with interactions btw ylim and perc
-    if ax is None: ax = plt.gca()
-    format_xlab(xlab); format_ylab(ylab)
-    if capitalize: capitalize_xticklabels()
-    if ylim is not None: ax.set_ylim(ylim)
-    if perc is not None: format_percentage(perc)
-    if labelwrap is not None: wrap_xticklabels(labelwrap)
-
-def add_grid(ax=None):
-    if ax is None: ax = plt.gca()
-    ax.grid(visible=True,which='major',axis='x')
-    
-def save_plot(name,ax=None): 
-    if ax is None: ax = plt.gca()
-    try:
-        ax.get_figure().savefig(f'../Results/Plots/{name}.pdf')
-    except FileNotFoundError:
-        warnings.warn('Create "../Results/Plots folder" to save figure files')
- 
-def annotate_tests(p_values,order,ymax,ax=None, low_test_margin=0.04,high_test_margin=0.015,low_offset=0):
-    if ax is None: ax = plt.gca()
-    # Add statistical annotations (e.g., p-values or significance stars)
-    for i, ((group1, group2), (t_val, p_val)) in enumerate(p_values.items()):
-        # Choose the positions for the annotations 
-        x1 = order.index(group1)
-        x2 = order.index(group2)
-        y_max = ymax - 0.0 + i * 0.07  # some padding
-        
-        # Annotate with a significance star based on the p-value
-        if p_val < 0.001: annotation = '***'
-        elif p_val < 0.01: annotation = '**'
-        elif p_val < 0.05: annotation = '*'
-        else: annotation = ''  # Not significant
-        
-        # Add the annotation to the plot
-        p_val_annotated = f'$P = {p_val:.3f}${annotation}' if p_val >= 0.001 else f'$P < 0.001${annotation}'
-        if i < 3:
-            ax.plot([x1, x1, x2, x2], [y_max, y_max + 0.01,y_max+ 0.01, y_max], linewidth=0.5,color='black', clip_on=False)
-            ax.text((x1 + x2) / 2, y_max + high_test_margin, p_val_annotated, ha='center', va='bottom', fontsize=8)
-        else: 
-            y_max -= 1.02 + low_offset
-            ax.plot([x1, x1, x2, x2], [y_max+ 0.01, y_max,y_max, y_max+ 0.01], linewidth=0.5,color='black', clip_on=False)
-            ax.text((x1 + x2) / 2, y_max - low_test_margin, p_val_annotated, ha='center', va='bottom', fontsize=8)
-            
-# Perform independent one-sided t-tests
-def one_sided_ttest(group1, group2):
-  t_statistic, p_value = stats.ttest_ind(group1, group2, alternative='less', equal_var=False)
-  return t_statistic, p_value
-
-def fit(df,target,features,model=sm.OLS):
-    if not isinstance(features, list): features = [features]
-    X = pd.get_dummies(df[features], drop_first=True)
-    X = sm.add_constant(X).astype(float)
-    Y = df[target]
-    model = model(Y, X).fit()
-    return model
-
-### get data
-def prepare_adh_df(df,map_values):
-    df_adh_map = pd.read_excel('../Data/adherence_summary.xlsx',).rename({'answer_participant':'answer'},axis=1)
-    df_adh = df[~(df.condition=='control')]
-    df_adh = pd.merge(df_adh.reset_index(),df_adh_map,how='left',on=['question','answer','condition'])
-    df_adh['Adherence'] = df_adh['Adherence'].replace(map_values).map({'yes':1,'no':0})
-    return df_adh.groupby('ResponseId').agg({'condition': 'first', 'Adherence': 'mean',})
-
-
-
-
-
-def get_tabular(model=None,summary_df=None, const_name="Intercept", replacements={'Ai':'AI','It':'IT'},
-                index_formatter=None, n_dc = 3, column_format='lrrrr',
-                add_info={'AIC':'aic','Obs. ($N$)': 'nobs'}):
-
-    if summary_df is None and model is not None:
-    # Extract coefficients, standard errors, p-values, and confidence intervals
-        summary_df = pd.DataFrame({
-            "Coef.": model.params,
-            "s.e.": model.bse,
-            "$P$-value": [p_val if p_val >= 0.0005 else '$< 0.001$' for p_val in model.pvalues],
-            "95 % CI": [f"[{low:.3f}; {high:.3f}]" for low, high in zip(model.conf_int()[0], model.conf_int()[1])]
-        })
-
-        summary_df.index = model.params.index #["Intercept", "Self-Save", "Self-Earn", "Environment-CO2"]
-    elif summary_df is not None and model is None:
-        summary_df = summary_df
-    else: raise ValueError(f"Supply either model or summary_df!")
-    
-    summary_df = summary_df.rename(index={'const': const_name},)
-    
-    if index_formatter is None: 
-        index_formatter = lambda o: '\\textit{' + o.replace('_',': ').title() + '}'
-    summary_df = summary_df.rename(index=index_formatter)
-
-    # Print as LaTeX-style table
-    tabular = summary_df.to_latex(float_format=f"%.{n_dc}f",escape=False,column_format=column_format,longtable=False)
-    tabular = tabular.replace('\\bottomrule','\midrule')
-    tabular = tabular.replace('\end{tabular}','')
-    tabular = tabular.replace('%','\%')
-    for k,v in replacements.items():
-        tabular = tabular.replace(k,v)
-    
-    # Additional model information
-    from operator import attrgetter
-    if isinstance(add_info,dict):
-        info = ''
-        for k,v in add_info.items():
-            getter = attrgetter(str(v))    
-            try: o = getter(model)
-            except AttributeError: o = v
-            if k == 'Obs. ($N$)':info += f"{k} & & & & {int(o)} \\\\ \n"
-            else: info += f"{k} & & & & {o:.3f} \\\\ \n"
-        tabular += info
-
-    tabular += '\\bottomrule\n\end{tabular}'
-    tabular = re.sub(r'-(?=\d)', r'$-$', tabular)
-    return tabular
-
-def to_table(tabular, fn, caption_text=None, label_text=None, center=True, rowwidth=1, footnotesize=True):
-    sum = "\\begin{table}\n"
-    if center: sum += "\\begin{center}\n"
-    caption_text = caption_text if caption_text is not None else fn
-    caption_text = latex_minus_and_p(caption_text)
-    if footnotesize: sum += "\\begingroup\n\\footnotesize\n"
-    if rowwidth is not None: sum += f"\\renewcommand{{\\arraystretch}}{{{rowwidth}}}\n"
-    sum += tabular if not isinstance(tabular, list) else "".join(tabular)
-    if footnotesize: sum += "\\endgroup\n"
-    if footnotesize: caption_text = "\\footnotesize " + caption_text
-    sum += f'\caption{{{caption_text}}}' 
-    sum += f'\n\label{{{label_text}}}' if label_text is not None else f'\n\label{{{"tab:"+fn.replace(" ", "-")}}}'
-    if center: sum += "\n\\end{center}"
-    sum += '\n\end{table}'
-    return sum
-
-def save_tex(fn,model=None,summary_df=None,caption=None, label=None,center=True,rowwidth=1,footnotesize=True,**kwargs):
-    tabular = get_tabular(model=model,summary_df=summary_df,**kwargs)
-    table = to_table(tabular,fn,caption,label,center,rowwidth,footnotesize)
-    order_of_supplements.append(fn)
-    try:
-        with open(f"../Results/Tex/{fn}.tex", 'w') as f: 
-            f.write(table)
-    except FileNotFoundError:
-        warnings.warn('Create "../Results/Tex folder" to save tex files')
-        
-# Save a dataframe to tex file
-def save_tabtex(o, fn, cap='Caption', lab='tab:my_label',escape=True, n_dec=3,footnotesize=True,rowwidth=1):
-    tex = '\\begin{table}\n\centering\n'
-    if footnotesize: tex += "\\begingroup\n\\footnotesize\n"
-    if rowwidth is not None: tex += f"\\renewcommand{{\\arraystretch}}{{{rowwidth}}}\n"
-    # if fontsize is not None: tex += fontsize + '\n'
-    tex += o.to_latex(escape=escape, float_format=f"%.{n_dec}f")
-    if footnotesize: 
-        tex += "\\endgroup\n"
-        caption_text = f'\caption{{\\footnotesize {cap}}}\n' 
-    else: caption_text = f'\caption{{{cap}}}\n'
-    tex += caption_text
-    tex += f'\label{{{lab}}}\n'
-    tex += '\\end{table}'
-    
-    try:
-        with open(f"../Results/Tex/{fn}.tex", "w") as f:
-            f.write(tex)
-    except FileNotFoundError:
-        warnings.warn('Create "../Results/Tex folder" to save tex files')
-    order_of_supplements.append(fn)
-
-
-# def save_mixedlm(fn, model, caption=None, label=None, fontsize='footnotesize'):
-    
-#     if caption is not None: caption = f'\caption{{{caption}}}'
-#     else: caption = f'\caption{{{fn}}}'
-#     if label is not None: caption += f'\n\label{{{label}}}'
-#     else:
-#         label = fn.replace(' ','_') 
-#         caption += f'\n\label{{tab:{label}}}'
-            
-#     sum = model.summary().as_latex()
-#     sum = sum.replace('\n\caption{Mixed Linear Model Regression Results}', '')
-#     sum = sum.replace('\n\label{}', '')
-#     sum = sum.replace('\\bigskip', '')
-#     sum = sum.strip()
-#     sum = sum.split('\end{table}')
-#     sum = sum[0] + caption + sum[1] + '\n\end{table}'
-#     with open(f"../Results/Tex/{fn}.tex", "w") as f:
-#         f.write(sum)
-    
-        
-        
-def escape_percent(s):
-    return re.sub(r'(?<!\\)%', r'\%', s)
-
-def latex_minus_and_p(s):
-    s = re.sub(r'-(?=\d)', r'$-$', s)
-    s = re.sub(r"P-", r"$P$-", s)
-    # s = re.sub(r"P <", r"$P$ <", s)
-    # s = re.sub(r"P >", r"$P$ >", s)
-    # pattern = r"(\[[^$]*?)-(\d+)([^$]*?\])"
-    # replacement = r"\1$-$\2\3"
-    # s = re.sub(pattern, replacement, s)
-    return s
-    
-# consolidate tex files
-def consolidate_tex(add_header=False):
-    o = ''
-    fn = "supplementary_materials.tex"
-    #for f in reversed(sorted(os.listdir('../Results/Tex',))):
-    for f in order_of_supplements:
-        try:
-            f = f + '.tex'
-            print(f)
-            if f == fn: continue
-            if add_header:
-                o += f"\section*{{{f.replace('.tex','')}}}\n"
-                o += f"\label{{sec:{f.replace(' ','_')}}}\n"
-                    
-            with open(f"../Results/Tex/{f}", "r") as f: 
-                o += escape_percent(f.read())
-            o += '\n\n'
-        except FileNotFoundError:
-            warnings.warn('Create "../Results/Tex folder" to save tex files')
-    
-    try:
-        with open(f"../Results/Tex/{fn}", "w") as f:    
-            f.write(o)
-    except FileNotFoundError:
-        warnings.warn('Create "../Results/Tex folder" to consolidatae tex files')
-    
-        
-def get_gpt_review_df():
-       output_review = pd.read_excel('../Data/LLM_output_reviews.xlsx',)
-       rename_map = {'Correct Diagnosis Chain of Thought Reasoning': 'chain-of-thought diagnosis correct',
-                     'Correct Diagnosis Standard': 'standard diagnosis correct', 
-                     'Correct Diagnosis Differential Diagnosis': 'differential diagnosis correct',
-                     'DD-Expl. Correct?': 'differential explanation correct',
-                     'CoT-Expl. Correct?': 'chain-of-thought explanation correct',
-                     'Std.-Expl. Correct?': 'standard explanation correct',}
-       output_review.rename(rename_map, inplace=True, axis=1)
-       output_review = output_review[output_review['Include Case in Study'] == 'Yes']
-       output_review.drop(['Spalte 30', 'Spalte 31', 'Spalte 32',
-              'Spalte 33', 'Spalte 34', 'Spalte 35', 'Spalte 36', 'Spalte 37',
-              'Spalte 38', 'Spalte 39', 'Spalte 40', 'Spalte 41', 'Spalte 42',
-              'Spalte 43', 'Spalte 44'], inplace=True, axis=1)
-       return output_review
-
-# 
 TASKS = {
     'question_1': "A previously healthy 5-year-old boy was brought to the surgery clinic with a 2-day history of intermittent abdominal pain. On palpation of the abdomen there was pain in the periumbilical region, but no rebound or guarding. An ultrasound was normal, and a computed tomography of the abdomen was performed (Panels A,B).",
     'question_2': "A 55-year-old man presented with 10 years of progressive handwriting impairment and rapid, slurred speech. In his thirties, he had worked as a welder without access to personal protective equipment. Neurologic examination was notable for reduced facial expression, blepharospasm, and cluttered, dysarthric speech. Postural reflexes were mildly impaired. MRI imaging of the head showed a nonenhancing, T1-weighted, hyperintense signal in the basal ganglia on both sides. Ceruloplasmin and iron levels were normal.",
@@ -453,4 +140,4 @@ DD_GPT = [
     {"question": "question_18", "condition": "differential", "diagnosis": ["Hepatic cystadenoma", "Pyogenic liver abscess", "Hepatic hemangioma", "Hepatocellular carcinoma (HCC)"]}, 
     {"question": "question_19", "condition": "differential", "diagnosis": ["Orbital lymphoma", "Orbital pseudotumor (Idiopathic Orbital Inflammatory Disease)", "Orbital sarcoma", "Sarcoidosis"]}, 
     {"question": "question_20", "condition": "differential", "diagnosis": ["Toxoplasmosis", "Tuberculosis", "Metastatic disease", "Sarcoidosis"]}
-    ]
\ No newline at end of file
+    ]
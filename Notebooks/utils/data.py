@@ -0,0 +1,24 @@
+import loader
+import adherence
+
+
+### get data
+def prepare_adh_df(df,map_values,source='top-1'):
+    # see adherence.DEFINITIONS / AdherenceEngine.compute to get several variants at once
+    return adherence.get_engine().compute(df, {'Adherence': (source, map_values)})
+
+def get_gpt_review_df():
+       output_review = loader.read_excel('../Data/LLM_output_reviews.xlsx',)
+       rename_map = {'Correct Diagnosis Chain of Thought Reasoning': 'chain-of-thought diagnosis correct',
+                     'Correct Diagnosis Standard': 'standard diagnosis correct', 
+                     'Correct Diagnosis Differential Diagnosis': 'differential diagnosis correct',
+                     'DD-Expl. Correct?': 'differential explanation correct',
+                     'CoT-Expl. Correct?': 'chain-of-thought explanation correct',
+                     'Std.-Expl. Correct?': 'standard explanation correct',}
+       output_review.rename(rename_map, inplace=True, axis=1)
+       output_review = output_review[output_review['Include Case in Study'] == 'Yes']
+       output_review.drop(['Spalte 30', 'Spalte 31', 'Spalte 32',
+              'Spalte 33', 'Spalte 34', 'Spalte 35', 'Spalte 36', 'Spalte 37',
+              'Spalte 38', 'Spalte 39', 'Spalte 40', 'Spalte 41', 'Spalte 42',
+              'Spalte 43', 'Spalte 44'], inplace=True, axis=1)
+       return output_review
@@ -0,0 +1,17 @@
+import statsmodels.api as sm
+import scipy.stats as stats
+import pandas as pd
+
+
+# Perform independent one-sided t-tests
+def one_sided_ttest(group1, group2):
+  t_statistic, p_value = stats.ttest_ind(group1, group2, alternative='less', equal_var=False)
+  return t_statistic, p_value
+
+def fit(df,target,features,model=sm.OLS):
+    if not isinstance(features, list): features = [features]
+    X = pd.get_dummies(df[features], drop_first=True)
+    X = sm.add_constant(X).astype(float)
+    Y = df[target]
+    model = model(Y, X).fit()
+    return model
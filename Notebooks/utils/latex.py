@@ -0,0 +1,168 @@
+import re
+import warnings
+import pandas as pd
+import build
+
+
+order_of_supplements = []
+
+def get_tabular(model=None,summary_df=None, const_name="Intercept", replacements={'Ai':'AI','It':'IT'},
+                index_formatter=None, n_dc = 3, column_format='lrrrr',
+                add_info={'AIC':'aic','Obs. ($N$)': 'nobs'}):
+
+    if summary_df is None and model is not None:
+    # Extract coefficients, standard errors, p-values, and confidence intervals
+        summary_df = pd.DataFrame({
+            "Coef.": model.params,
+            "s.e.": model.bse,
+            "$P$-value": [p_val if not p_val < 0.0005 else '$< 0.001$' for p_val in model.pvalues],
+            "95 % CI": [f"[{low:.3f}; {high:.3f}]" for low, high in zip(model.conf_int()[0], model.conf_int()[1])]
+        })
+
+        summary_df.index = model.params.index #["Intercept", "Self-Save", "Self-Earn", "Environment-CO2"]
+    elif summary_df is not None and model is None:
+        summary_df = summary_df
+    else: raise ValueError(f"Supply either model or summary_df!")
+    
+    summary_df = summary_df.rename(index={'const': const_name},)
+    
+    if index_formatter is None: 
+        index_formatter = lambda o: '\\textit{' + o.replace('_',': ').title() + '}'
+    summary_df = summary_df.rename(index=index_formatter)
+
+    # Print as LaTeX-style table
+    tabular = summary_df.to_latex(float_format=f"%.{n_dc}f",escape=False,column_format=column_format,longtable=False)
+    tabular = tabular.replace('\\bottomrule','\midrule')
+    tabular = tabular.replace('\end{tabular}','')
+    tabular = tabular.replace('%','\%')
+    for k,v in replacements.items():
+        tabular = tabular.replace(k,v)
+    
+    # Additional model information
+    from operator import attrgetter
+    if isinstance(add_info,dict):
+        info = ''
+        for k,v in add_info.items():
+            getter = attrgetter(str(v))    
+            try: o = getter(model)
+            except AttributeError: o = v
+            if k == 'Obs. ($N$)':info += f"{k} & & & & {int(o)} \\\\ \n"
+            else: info += f"{k} & & & & {o:.3f} \\\\ \n"
+        tabular += info
+
+    tabular += '\\bottomrule\n\end{tabular}'
+    # minus signs of numbers only, not of labels like COVID-19 or exponents like 1e-05
+    tabular = re.sub(r'(?<![\w.])-(?=\d)', r'$-$', tabular)
+    return tabular
+
+def to_table(tabular, fn, caption_text=None, label_text=None, center=True, rowwidth=1, footnotesize=True):
+    sum = "\\begin{table}\n"
+    if center: sum += "\\begin{center}\n"
+    caption_text = caption_text if caption_text is not None else fn
+    caption_text = latex_minus_and_p(caption_text)
+    if footnotesize: sum += "\\begingroup\n\\footnotesize\n"
+    if rowwidth is not None: sum += f"\\renewcommand{{\\arraystretch}}{{{rowwidth}}}\n"
+    sum += tabular if not isinstance(tabular, list) else "".join(tabular)
+    if footnotesize: sum += "\\endgroup\n"
+    if footnotesize: caption_text = "\\footnotesize " + caption_text
+    sum += f'\caption{{{caption_text}}}' 
+    sum += f'\n\label{{{label_text}}}' if label_text is not None else f'\n\label{{{"tab:"+fn.replace(" ", "-")}}}'
+    if center: sum += "\n\\end{center}"
+    sum += '\n\end{table}'
+    return sum
+
+def save_tex(fn,model=None,summary_df=None,caption=None, label=None,center=True,rowwidth=1,footnotesize=True,**kwargs):
+    tabular = get_tabular(model=model,summary_df=summary_df,**kwargs)
+    table = to_table(tabular,fn,caption,label,center,rowwidth,footnotesize)
+    order_of_supplements.append(fn)
+    try:
+        with open(f"../Results/Tex/{fn}.tex", 'w') as f: 
+            f.write(table)
+        build.record(fn, 'tex')
+    except FileNotFoundError:
+        warnings.warn('Create "../Results/Tex folder" to save tex files')
+        
+# Save a dataframe to tex file
+def save_tabtex(o, fn, cap='Caption', lab='tab:my_label',escape=True, n_dec=3,footnotesize=True,rowwidth=1):
+    tex = '\\begin{table}\n\centering\n'
+    if footnotesize: tex += "\\begingroup\n\\footnotesize\n"
+    if rowwidth is not None: tex += f"\\renewcommand{{\\arraystretch}}{{{rowwidth}}}\n"
+    # if fontsize is not None: tex += fontsize + '\n'
+    tex += o.to_latex(escape=escape, float_format=f"%.{n_dec}f")
+    if footnotesize: 
+        tex += "\\endgroup\n"
+        caption_text = f'\caption{{\\footnotesize {cap}}}\n' 
+    else: caption_text = f'\caption{{{cap}}}\n'
+    tex += caption_text
+    tex += f'\label{{{lab}}}\n'
+    tex += '\\end{table}'
+    
+    try:
+        with open(f"../Results/Tex/{fn}.tex", "w") as f:
+            f.write(tex)
+        build.record(fn, 'tex')
+    except FileNotFoundError:
+        warnings.warn('Create "../Results/Tex folder" to save tex files')
+    order_of_supplements.append(fn)
+
+
+# def save_mixedlm(fn, model, caption=None, label=None, fontsize='footnotesize'):
+    
+#     if caption is not None: caption = f'\caption{{{caption}}}'
+#     else: caption = f'\caption{{{fn}}}'
+#     if label is not None: caption += f'\n\label{{{label}}}'
+#     else:
+#         label = fn.replace(' ','_') 
+#         caption += f'\n\label{{tab:{label}}}'
+            
+#     sum = model.summary().as_latex()
+#     sum = sum.replace('\n\caption{Mixed Linear Model Regression Results}', '')
+#     sum = sum.replace('\n\label{}', '')
+#     sum = sum.replace('\\bigskip', '')
+#     sum = sum.strip()
+#     sum = sum.split('\end{table}')
+#     sum = sum[0] + caption + sum[1] + '\n\end{table}'
+#     with open(f"../Results/Tex/{fn}.tex", "w") as f:
+#         f.write(sum)
+    
+        
+        
+def escape_percent(s):
+    return re.sub(r'(?<!\\)%', r'\%', s)
+
+def latex_minus_and_p(s):
+    s = re.sub(r'(?<![\w.])-(?=\d)', r'$-$', s)
+    s = re.sub(r"P-", r"$P$-", s)
+    # s = re.sub(r"P <", r"$P$ <", s)
+    # s = re.sub(r"P >", r"$P$ >", s)
+    # pattern = r"(\[[^$]*?)-(\d+)([^$]*?\])"
+    # replacement = r"\1$-$\2\3"
+    # s = re.sub(pattern, replacement, s)
+    return s
+    
+# consolidate tex files
+def consolidate_tex(add_header=False):
+    o = ''
+    fn = "supplementary_materials.tex"
+    #for f in reversed(sorted(os.listdir('../Results/Tex',))):
+    # order from the persisted manifest, so that not every cell has to run in the same kernel
+    for f in build.supplement_order() or order_of_supplements:
+        try:
+            f = f + '.tex'
+            print(f)
+            if f == fn: continue
+            if add_header:
+                o += f"\section*{{{f.replace('.tex','')}}}\n"
+                o += f"\label{{sec:{f.replace(' ','_')}}}\n"
+                    
+            with open(f"../Results/Tex/{f}", "r") as f: 
+                o += escape_percent(f.read())
+            o += '\n\n'
+        except FileNotFoundError:
+            warnings.warn('Create "../Results/Tex folder" to save tex files')
+    
+    try:
+        with open(f"../Results/Tex/{fn}", "w") as f:    
+            f.write(o)
+    except FileNotFoundError:
+        warnings.warn('Create "../Results/Tex folder" to consolidatae tex files')
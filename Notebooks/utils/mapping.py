@@ -0,0 +1,19 @@
+def round(num, ndec):
+    import math
+    multiplier = 10 ** ndec
+    return math.floor(num * multiplier + 0.5) / multiplier
+
+
+### mapping functions
+def map_condition(i):
+  if i == 1: return 'control'
+  elif i == 2: return 'standard'
+  elif i == 3: return 'chain-of-thought'
+  elif i == 4: return 'differential'
+  else: raise ValueError
+ 
+def map_condition_label(label):
+    label = label.strip()
+    if label == 'Differential' or label == 'differential':
+        return 'Differential diagnosis'
+    return label
@@ -0,0 +1,86 @@
+import textwrap
+import warnings
+import matplotlib.pyplot as plt 
+import matplotlib.ticker as mtick
+import build
+from .mapping import map_condition_label
+
+
+### plotting functions
+def bar_annotate_n(sample_sizes,y=10,ax=None):
+    if ax is None: ax = plt.gca()
+    for bar, n in zip(ax.patches, sample_sizes):
+        x = bar.get_x() + bar.get_width() / 2
+        ax.text(x, y, f'$n={n}$', ha='center', va='bottom', fontsize=10, fontdict={'color': 'white'})
+    
+def format_ylab(ylab=None,ax=None): 
+    if ax is None: ax = plt.gca()   
+    if ylab is None: 
+        l = ax.get_ylabel().replace('-',' ').capitalize()
+        ax.set_ylabel(l)
+    else: ax.set_ylabel(ylab)
+    
+def format_xlab(xlab=None,ax=None):
+    if ax is None: ax = plt.gca()
+    if xlab is None: 
+        l = ' '.join(word.capitalize() for word in ax.get_xlabel().split())
+        ax.set_xlabel(l)
+    else: ax.set_xlabel(xlab)
+    
+def capitalize_xticklabels(ax=None): 
+    if ax is None: ax = plt.gca()
+    ax.set_xticklabels([_.get_text().capitalize() for _ in ax.get_xticklabels()])
+def wrap_xticklabels(labelwrap,ax=None):
+    if ax is None: ax = plt.gca()
+    labels = [textwrap.fill(map_condition_label(tick.get_text()), width=labelwrap) for tick in ax.get_xticklabels()]
+    ax.set_xticklabels(labels, rotation=0)
+
+def format_percentage(perc,ax=None): 
+    if ax is None: ax = plt.gca()
+    ax.yaxis.set_major_formatter(mtick.PercentFormatter(xmax=perc))
+
+def format_labs(ylab=None,xlab=None,ylim=(0,100),capitalize=True,perc=100,labelwrap=12,ax=None):
+    # careful with interactions btw ylim and perc
+    if ax is None: ax = plt.gca()
+    format_xlab(xlab,ax=ax); format_ylab(ylab,ax=ax)
+    if capitalize: capitalize_xticklabels(ax=ax)
+    if ylim is not None: ax.set_ylim(ylim)
+    if perc is not None: format_percentage(perc,ax=ax)
+    if labelwrap is not None: wrap_xticklabels(labelwrap,ax=ax)
+
+def add_grid(ax=None):
+    if ax is None: ax = plt.gca()
+    ax.grid(visible=True,which='major',axis='x')
+    
+def save_plot(name,ax=None): 
+    if ax is None: ax = plt.gca()
+    try:
+        ax.get_figure().savefig(f'../Results/Plots/{name}.pdf')
+        build.record(name, 'plot')
+    except FileNotFoundError:
+        warnings.warn('Create "../Results/Plots folder" to save figure files')
+ 
+def annotate_tests(p_values,order,ymax,ax=None, low_test_margin=0.04,high_test_margin=0.015,low_offset=0):
+    if ax is None: ax = plt.gca()
+    # Add statistical annotations (e.g., p-values or significance stars)
+    for i, ((group1, group2), (t_val, p_val)) in enumerate(p_values.items()):
+        # Choose the positions for the annotations 
+        x1 = order.index(group1)
+        x2 = order.index(group2)
+        y_max = ymax - 0.0 + i * 0.07  # some padding
+        
+        # Annotate with a significance star based on the p-value
+        if p_val < 0.001: annotation = '***'
+        elif p_val < 0.01: annotation = '**'
+        elif p_val < 0.05: annotation = '*'
+        else: annotation = ''  # Not significant
+        
+        # Add the annotation to the plot
+        p_val_annotated = f'$P = {p_val:.3f}${annotation}' if p_val >= 0.001 else f'$P < 0.001${annotation}'
+        if i < 3:
+            ax.plot([x1, x1, x2, x2], [y_max, y_max + 0.01,y_max+ 0.01, y_max], linewidth=0.5,color='black', clip_on=False)
+            ax.text((x1 + x2) / 2, y_max + high_test_margin, p_val_annotated, ha='center', va='bottom', fontsize=8)
+        else: 
+            y_max -= 1.02 + low_offset
+            ax.plot([x1, x1, x2, x2], [y_max+ 0.01, y_max,y_max, y_max+ 0.01], linewidth=0.5,color='black', clip_on=False)
+            ax.text((x1 + x2) / 2, y_max - low_test_margin, p_val_annotated, ha='center', va='bottom', fontsize=8)